@@ -0,0 +1,211 @@
+"""
+Free-room finder: "which room is free on Thursdays 6-8 PM for the next 10 weeks?"
+
+FreeRoomFinder precomputes one bitset per booked room and day from the
+merged slots (bit m set = minute m is booked; 180 bytes per room-day).
+Room-days without bookings take no memory, and the bitsets are filled a
+chunk of room-days at a time from the sorted intervals. A query unpacks
+only the bytes of its time window for the requested days, so it answers
+in about a millisecond even over a full term of slots.
+
+Usage:
+    python free_rooms.py --weekday Thursday --from 18:00 --to 20:00 --weeks 10 [--group المنارات] [--input FILE]
+"""
+import argparse
+import sys
+from datetime import date, datetime, timedelta
+
+from interval_index import IntervalIndex, parse_minutes
+
+MINUTES_PER_DAY = 24 * 60
+
+# Room-days whose per-minute counts are built at once (about 3 MB)
+ROOM_DAYS_PER_CHUNK = 1024
+
+# Python weekday numbers of the English and Arabic day names
+WEEKDAY_NUMBERS = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3, 'friday': 4, 'saturday': 5, 'sunday': 6,
+    'الاثنين': 0, 'الثلاثاء': 1, 'الأربعاء': 2, 'الخميس': 3, 'الجمعة': 4, 'السبت': 5, 'الأحد': 6,
+}
+
+
+def parse_weekday(name):
+    """Python weekday number of an English or Arabic day name; ValueError when unknown."""
+    number = WEEKDAY_NUMBERS.get(str(name).strip().lower())
+    if number is None:
+        raise ValueError(f"unknown weekday: {name}")
+    return number
+
+
+def query_dates(start_date, end_date=None, weekday=None, weeks=None):
+    """
+    The dates a query covers: every date from start_date to end_date, or
+    the next `weeks` weeks, optionally only those falling on `weekday`.
+    """
+    if end_date is None:
+        end_date = start_date + timedelta(weeks=weeks or 1, days=-1)
+    dates = []
+    current = start_date
+    while current <= end_date:
+        if weekday is None or current.weekday() == weekday:
+            dates.append(current)
+        current += timedelta(days=1)
+    return dates
+
+
+class FreeRoomFinder:
+    """
+    Booked-minute bitsets of every room and day that has a booking, keyed
+    by room position * day_count + day (days counted from first_date).
+    `rooms` are all rooms the finder knows; pass the full room list so rooms
+    that have no bookings at all are reported as free.
+    """
+
+    def __init__(self, merged_df, rooms=()):
+        import numpy as np
+
+        occupied = IntervalIndex(merged_df).occupied() if not merged_df.empty else None
+        known = set(rooms)
+        if occupied is not None:
+            known.update(occupied['room'].unique())
+        self.rooms = sorted(known)
+        self.room_positions = {room: position for position, room in enumerate(self.rooms)}
+
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.bits = np.zeros((0, MINUTES_PER_DAY // 8), dtype=np.uint8)
+        if occupied is None or occupied.empty:
+            self.first_date = None
+            self.day_count = 0
+            return
+
+        self.first_date = occupied['date'].min().date()
+        self.day_count = (occupied['date'].max().date() - self.first_date).days + 1
+        room_codes = occupied['room'].map(self.room_positions).to_numpy(dtype=np.int64)
+        day_codes = (occupied['date'] - occupied['date'].min()).dt.days.to_numpy(dtype=np.int64)
+        starts = np.clip(occupied['start'].to_numpy(), 0, MINUTES_PER_DAY)
+        ends = np.clip(occupied['end'].to_numpy(), 0, MINUTES_PER_DAY)
+
+        # One bitset row per booked (room, day), the intervals sorted by their row
+        self.keys, rows = np.unique(room_codes * self.day_count + day_codes, return_inverse=True)
+        order = np.argsort(rows, kind='stable')
+        rows, starts, ends = rows[order], starts[order], ends[order]
+        self.bits = np.zeros((len(self.keys), MINUTES_PER_DAY // 8), dtype=np.uint8)
+        for first in range(0, len(self.keys), ROOM_DAYS_PER_CHUNK):
+            last = min(first + ROOM_DAYS_PER_CHUNK, len(self.keys))
+            low, high = np.searchsorted(rows, [first, last])
+            # +1 at every start and -1 at every end; the running sum is > 0 on booked minutes
+            changes = np.zeros((last - first, MINUTES_PER_DAY + 1), dtype=np.int16)
+            np.add.at(changes, (rows[low:high] - first, starts[low:high]), 1)
+            np.add.at(changes, (rows[low:high] - first, ends[low:high]), -1)
+            booked = np.cumsum(changes, axis=1, dtype=np.int16)[:, :MINUTES_PER_DAY] > 0
+            self.bits[first:last] = np.packbits(booked, axis=1)
+
+    def free_rooms(self, dates, start_time, end_time, rooms=None):
+        """
+        Rooms (of `rooms`, all rooms by default) with no booking between
+        start_time and end_time ('HH:MM') on any of `dates`. Days outside the
+        loaded slots have no bookings and count as free.
+        """
+        import numpy as np
+
+        start, end = parse_minutes(start_time), parse_minutes(end_time)
+        if not (0 <= start < end <= MINUTES_PER_DAY):
+            raise ValueError(f"invalid time window: {start_time} - {end_time}")
+
+        candidates = self.rooms if rooms is None else [room for room in self.rooms if room in set(rooms)]
+        if not candidates or self.first_date is None:
+            return candidates
+        day_codes = np.array([(day - self.first_date).days for day in dates], dtype=np.int64)
+        day_codes = day_codes[(day_codes >= 0) & (day_codes < self.day_count)]
+        if not len(day_codes):
+            return candidates
+
+        room_codes = np.array([self.room_positions[room] for room in candidates], dtype=np.int64)
+        keys = room_codes[:, None] * self.day_count + day_codes[None, :]
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        # Room-days without a bitset have no bookings
+        booked_days = self.keys[positions] == keys
+        window = self.bits[positions[booked_days], start // 8:(end + 7) // 8]
+        booked = np.unpackbits(window, axis=1)[:, start % 8:start % 8 + end - start].any(axis=1)
+        busy = np.zeros(keys.shape, dtype=bool)
+        busy[booked_days] = booked
+        return [room for room, is_busy in zip(candidates, busy.any(axis=1)) if not is_busy]
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%d.%m.%Y").date()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lists the rooms that are free for a whole time window on the given days.")
+    parser.add_argument('--from', dest='start_time', required=True, help="window start HH:MM")
+    parser.add_argument('--to', dest='end_time', required=True, help="window end HH:MM")
+    parser.add_argument('--weekday', help="only this weekday (English or Arabic name)")
+    parser.add_argument('--start', help="first date DD.MM.YYYY (today by default)")
+    parser.add_argument('--end', help="last date DD.MM.YYYY")
+    parser.add_argument('--weeks', type=int, default=1, help="number of weeks from --start when --end is not given")
+    parser.add_argument('--group', metavar='NAME', help="only rooms of the room group (or rooms) whose name contains NAME")
+    parser.add_argument('--input', metavar='FILE', help="read the slots from a mongoexport/backup JSON file instead of MongoDB")
+    args = parser.parse_args(argv)
+
+    import contextlib
+    import io
+    import time
+
+    from report_loader import load_report_script
+    from room_index import RoomIndex
+
+    try:
+        start_date = _parse_date(args.start) if args.start else date.today()
+        end_date = _parse_date(args.end) if args.end else None
+        weekday = parse_weekday(args.weekday) if args.weekday else None
+    except ValueError as exc:
+        print(f"مدخلات غير صحيحة: {exc}")
+        return 1
+    dates = query_dates(start_date, end_date, weekday, args.weeks)
+    if not dates:
+        print("لا توجد أيام مطابقة في الفترة المحددة.")
+        return 1
+
+    report = load_report_script()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if args.input:
+            room_index = RoomIndex.from_backup()
+            slots = report.load_slots_from_file(args.input, dates[0], dates[-1])
+        else:
+            mongo_uri, db_name, collection_name = report.get_mongo_settings()
+            room_index = RoomIndex.from_mongo(mongo_uri, db_name)
+            slots = report.fetch_slots_from_mongo(mongo_uri, db_name, collection_name, dates[0], dates[-1])
+        merged = report.merge_booked_slots(slots, room_index=room_index)
+
+    # Disabled rooms cannot be booked, so they are never offered as free
+    finder = FreeRoomFinder(room_index.without_disabled_rooms(merged), rooms=room_index.names.values())
+    rooms = None
+    if args.group:
+        room_ids = room_index.room_ids_matching([args.group])
+        if not room_ids:
+            # Otherwise an unknown name would read as "every room is booked"
+            print(f"لا توجد غرفة أو مجموعة غرف باسم '{args.group}'.")
+            return 1
+        rooms = [room_index.names[room_id] for room_id in room_ids if room_id in room_index.names]
+
+    started = time.perf_counter()
+    try:
+        free = finder.free_rooms(dates, args.start_time, args.end_time, rooms=rooms)
+    except ValueError as exc:
+        print(f"مدخلات غير صحيحة: {exc}")
+        return 1
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    print(f"الغرف المتاحة من {args.start_time} إلى {args.end_time} في {len(dates)} يوم "
+          f"({dates[0]:%d.%m.%Y} - {dates[-1]:%d.%m.%Y}):")
+    for room in free:
+        print(f"  - {room}")
+    if not free:
+        print("  لا توجد غرف متاحة.")
+    print(f"({elapsed_ms:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Booking days in Cairo local time, as int32 day ordinals.
+
+Slot dates are stored as UTC instants; a slot the backend saved at local
+midnight sits at 21:00 or 22:00 UTC of the previous day. Every date is
+converted once, vectorized, to the Cairo calendar day it falls on and kept
+as a proleptic Gregorian ordinal (date.toordinal()), so weekdays, 7-day
+gaps and range filters are integer arithmetic.
+"""
+
+LOCAL_TIMEZONE = 'Africa/Cairo'
+
+# datetime64[D] day 0 (1970-01-01) as an ordinal
+EPOCH_ORDINAL = 719163
+
+# Stands for dates that did not parse
+NO_DAY = -1
+
+
+def local_day_ordinals(values):
+    """
+    Cairo-local day ordinals (int32 Series) of a Series of datetimes, date
+    strings or date objects; naive values are taken as UTC, like MongoDB
+    stores them. NO_DAY where the value is not a date.
+    """
+    import numpy as np
+    import pandas as pd
+
+    instants = pd.to_datetime(values, errors='coerce', utc=True)
+    local = instants.dt.tz_convert(LOCAL_TIMEZONE).dt.tz_localize(None)
+    days = local.to_numpy().astype('datetime64[D]')
+    ordinals = np.where(np.isnat(days), NO_DAY, days.astype(np.int64) + EPOCH_ORDINAL)
+    return pd.Series(ordinals.astype(np.int32), index=values.index)
+
+
+def ordinal_dates(ordinals):
+    """Naive midnight datetime64 values of day ordinals."""
+    import numpy as np
+
+    return (np.asarray(ordinals, dtype=np.int64) - EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[ns]')
+
+
+def ordinal_weekdays(ordinals):
+    """Python weekday numbers (Monday = 0) of day ordinals; ordinal 1 is a Monday."""
+    return (ordinals + 6) % 7
@@ -0,0 +1,96 @@
+"""
+One MongoDB client per URI for the whole process.
+
+Opening a MongoClient against Atlas costs an SRV lookup, server discovery
+and a TLS handshake before the first query runs. The reports, the room
+index, the free-rooms search and the long-running service all get their
+client here instead: it is created and pinged on first use, pooled, and
+reused by every later fetch until the process exits.
+
+Connection setup and queries are timed separately: shared_client() runs
+in the caller's 'connect' stage (which records whether an existing client
+was reused), and the queries stay in the caller's 'fetch' stages.
+"""
+import atexit
+import importlib.util
+import os
+import threading
+import time
+
+from report_stats import NO_STATS
+
+POOL_SIZE = int(os.getenv('MONGO_POOL_SIZE', '10'))
+CONNECT_TIMEOUT_MS = 10_000
+SERVER_SELECTION_TIMEOUT_MS = 15_000
+# A full-range fetch of a large slots collection can take a while on a slow link
+SOCKET_TIMEOUT_MS = 120_000
+
+# Wire compressors in order of preference, with the module each one needs (zlib is built in)
+COMPRESSORS = (('zstd', 'zstandard'), ('snappy', 'snappy'), ('zlib', None))
+
+_clients = {}
+_setup_seconds = {}
+_lock = threading.Lock()
+
+
+def available_compressors():
+    """The preferred compressors whose Python package is installed; MONGO_COMPRESSORS overrides."""
+    configured = os.getenv('MONGO_COMPRESSORS')
+    if configured is not None:
+        return [name.strip() for name in configured.split(',') if name.strip()]
+    return [name for name, module in COMPRESSORS
+            if module is None or importlib.util.find_spec(module) is not None]
+
+
+def client_options(pool_size=POOL_SIZE):
+    return {
+        'maxPoolSize': pool_size,
+        'connectTimeoutMS': CONNECT_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': SERVER_SELECTION_TIMEOUT_MS,
+        'socketTimeoutMS': SOCKET_TIMEOUT_MS,
+        'compressors': available_compressors(),
+    }
+
+
+def get_client(uri, pool_size=POOL_SIZE):
+    """
+    The process's client for uri, created and connected on the first call.
+    The pool size of the first call wins. Do not close the client; it is
+    closed when the process exits.
+    """
+    from pymongo import MongoClient
+
+    with _lock:
+        client = _clients.get(uri)
+        if client is None:
+            started = time.perf_counter()
+            client = MongoClient(uri, **client_options(pool_size))
+            try:
+                # MongoClient connects lazily; ping so connection setup is not billed to the first query
+                client.admin.command('ping')
+            except Exception:
+                client.close()
+                raise
+            _setup_seconds[uri] = time.perf_counter() - started
+            _clients[uri] = client
+    return client
+
+
+def shared_client(uri, stats=None, pool_size=POOL_SIZE):
+    """get_client() inside a 'connect' stage that records whether the client was reused."""
+    stats = stats or NO_STATS
+    with stats.stage('connect') as stage:
+        reused = uri in _clients
+        client = get_client(uri, pool_size=pool_size)
+        stage['reused'] = reused
+        stage['setup_s'] = round(_setup_seconds[uri], 4)
+    return client
+
+
+@atexit.register
+def close_clients():
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        _setup_seconds.clear()
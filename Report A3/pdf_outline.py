@@ -0,0 +1,54 @@
+"""
+PDF bookmarks collected while the A3 report is laid out.
+
+A printed table of contents needs the page numbers before the first page
+is drawn, which is why ReportLab's multiBuild lays the document out twice.
+The outline (the bookmarks panel of PDF viewers) does not: each entry is
+added when the page it points to is drawn, during the one doc.build.
+
+Section titles carry an `outline_title` and are picked up by the
+template's afterFlowable hook. Rooms and weekdays are rows inside a table,
+which reaches afterFlowable only as a whole, so their cells start with a
+zero-size OutlineEntry that adds the bookmark where the table draws it.
+
+Imported by create_pdf and the row builders only, so reportlab stays a
+lazy import of the report script.
+"""
+from reportlab.platypus import Flowable, SimpleDocTemplate
+
+
+class OutlineEntry(Flowable):
+    """Takes no space; adds an outline entry pointing at the spot it is drawn."""
+
+    def __init__(self, title, level):
+        super().__init__()
+        self.title = str(title)
+        self.level = level
+
+    def wrap(self, available_width, available_height):
+        return 0, 0
+
+    def draw(self):
+        key = f"outline-{id(self)}"
+        self.canv.bookmarkHorizontal(key, 0, 0)
+        self.canv.addOutlineEntry(self.title, key, level=self.level, closed=True)
+
+
+def outlined(cell, title, level):
+    """A table cell that also adds an outline entry for its row."""
+    return [OutlineEntry(title, level), cell]
+
+
+class OutlineDocTemplate(SimpleDocTemplate):
+    """SimpleDocTemplate that bookmarks every flowable with an `outline_title` at level 0."""
+
+    def beforeDocument(self):
+        # Open the bookmarks panel when the file is opened
+        self.canv.showOutline()
+
+    def afterFlowable(self, flowable):
+        title = getattr(flowable, 'outline_title', None)
+        if title is not None:
+            key = f"outline-{id(flowable)}"
+            self.canv.bookmarkPage(key)
+            self.canv.addOutlineEntry(title, key, level=0, closed=False)
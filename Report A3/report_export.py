@@ -0,0 +1,275 @@
+"""
+Streaming CSV, XLSX and HTML exports of the processed report records.
+
+The records from process_bookings (and summarize_room_groups) are written
+row by row as they are produced, without the PDF shaping and layout, so the
+data staff search and filter is available in milliseconds. Every format is
+right-to-left with the same columns as the PDF tables (rightmost first) and
+Eastern Arabic numerals. XLSX is written directly as SpreadsheetML, so no
+spreadsheet library is needed.
+"""
+import csv
+import os
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from report_records import format_date, format_date_range, format_day, format_exceptions, format_time_range
+from report_stats import NO_STATS
+
+EASTERN_DIGITS = str.maketrans('0123456789', '٠١٢٣٤٥٦٧٨٩')
+
+FORMATS = ('csv', 'xlsx', 'html')
+
+
+def _date_range(item):
+    return format_date_range(item.first_date, item.last_date)
+
+
+def _time_range(item):
+    return format_time_range(item.start, item.end)
+
+
+def _exceptions(item):
+    return format_exceptions(item.missing_dates, item.extra_dates)
+
+
+def _day(item):
+    return format_day(item.weekday)
+
+
+def _date(item):
+    return format_date(item.date)
+
+
+# (section key, title, [(header, record field or function of the record)]), in PDF order
+SECTIONS = [
+    ('recurring', 'المواعيد الثابتة', [
+        ('التاريخ', _date_range), ('الاستثناءات', _exceptions), ('الوقت', _time_range), ('عدد الحجوزات', 'booking_count'),
+        ('اليوم', _day), ('الغرفة', 'room'), ('الخدمة', 'service'), ('الخادم المسؤول', 'provider'),
+    ]),
+    ('one_time', 'الحجوزات لمرة واحدة', [
+        ('التاريخ', _date), ('الوقت', _time_range), ('الغرفة', 'room'), ('الخدمة', 'service'), ('الخادم المسؤول', 'provider'),
+    ]),
+    ('grouped', 'الحجوزات المجمعة حسب المكان', [
+        ('عدد الحجوزات', 'booking_count'), ('الوقت', _time_range), ('التاريخ', _date_range), ('اليوم', _day),
+        ('الخدمة', 'service'), ('مقدم الخدمة', 'provider'), ('الأماكن', 'rooms'),
+    ]),
+    ('room_groups', 'الحجوزات حسب مجموعات الغرف', [
+        ('عدد الحجوزات', 'booking_count'), ('التاريخ', _date_range), ('الوقت', _time_range), ('اليوم', _day),
+        ('الخدمة', 'service'), ('الخادم المسؤول', 'provider'), ('الغرف', 'rooms'), ('المجموعة', 'group'),
+    ]),
+]
+
+# Characters XML 1.0 does not allow, dropped from XLSX cells
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _sections(records_by_section):
+    """(key, title, columns, records) for every section present in records_by_section."""
+    for key, title, columns in SECTIONS:
+        records = records_by_section.get(key)
+        if records is not None:
+            yield key, title, columns, records
+
+
+def section_rows(records, columns, eastern_numerals=True):
+    """Yields one list of cell strings per record, in column order."""
+    for item in records:
+        row = []
+        for _, field in columns:
+            value = field(item) if callable(field) else getattr(item, field)
+            text = '' if value is None else str(value)
+            row.append(text.translate(EASTERN_DIGITS) if eastern_numerals else text)
+        yield row
+
+
+def export_csv(records_by_section, base_path, eastern_numerals=True):
+    """
+    Writes one UTF-8 CSV per section (<base>-<section>.csv, with a BOM so
+    Excel detects the encoding) and returns the written paths.
+    """
+    paths = []
+    for key, _, columns, records in _sections(records_by_section):
+        path = f"{base_path}-{key}.csv"
+        with open(path, 'w', encoding='utf-8-sig', newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow([header for header, _ in columns])
+            writer.writerows(section_rows(records, columns, eastern_numerals))
+        paths.append(path)
+    return paths
+
+
+def _column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def _xlsx_row(number, cells, style=0):
+    style_attribute = f' s="{style}"' if style else ''
+    body = ''.join(
+        f'<c t="inlineStr"{style_attribute}><is><t xml:space="preserve">{escape(_INVALID_XML.sub("", cell))}</t></is></c>'
+        for cell in cells
+    )
+    return f'<row r="{number}">{body}</row>'
+
+
+_XLSX_STATIC = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '{sheets}'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="2"><font><sz val="11"/><name val="Arial"/></font><font><b/><sz val="11"/><name val="Arial"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+
+
+def export_xlsx(records_by_section, path, eastern_numerals=True):
+    """
+    Writes an .xlsx workbook with one right-to-left sheet per section, a
+    frozen bold header row and an auto-filter. Rows are streamed into the
+    zip entry as they are produced.
+    """
+    sheets = []
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for key, title, columns, records in _sections(records_by_section):
+            number = len(sheets) + 1
+            rows = 1
+            with archive.open(f'xl/worksheets/sheet{number}.xml', 'w') as sheet:
+                sheet.write((
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                    '<sheetViews><sheetView rightToLeft="1" workbookViewId="0">'
+                    '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                    '</sheetView></sheetViews>'
+                    '<sheetData>' + _xlsx_row(1, [header for header, _ in columns], style=1)
+                ).encode('utf-8'))
+                for row in section_rows(records, columns, eastern_numerals):
+                    rows += 1
+                    sheet.write(_xlsx_row(rows, row).encode('utf-8'))
+                last_cell = f"{_column_letter(len(columns) - 1)}{rows}"
+                sheet.write(f'</sheetData><autoFilter ref="A1:{last_cell}"/></worksheet>'.encode('utf-8'))
+            # Sheet names are limited to 31 characters
+            sheets.append((number, title[:31]))
+
+        content_types = ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{number}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for number, _ in sheets
+        )
+        archive.writestr('[Content_Types].xml', _XLSX_STATIC['[Content_Types].xml'].replace('{sheets}', content_types))
+        archive.writestr('_rels/.rels', _XLSX_STATIC['_rels/.rels'])
+        archive.writestr('xl/styles.xml', _XLSX_STATIC['xl/styles.xml'])
+        archive.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            '<sheets>'
+            + ''.join(f'<sheet name="{escape(name)}" sheetId="{number}" r:id="rId{number}"/>' for number, name in sheets)
+            + '</sheets></workbook>'
+        ))
+        archive.writestr('xl/_rels/workbook.xml.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + ''.join(f'<Relationship Id="rId{number}" '
+                      'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                      f'Target="worksheets/sheet{number}.xml"/>' for number, _ in sheets)
+            + f'<Relationship Id="rId{len(sheets) + 1}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+            '</Relationships>'
+        ))
+    return path
+
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html lang="ar" dir="rtl">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: "Segoe UI", Tahoma, Arial, sans-serif; margin: 24px; }}
+table {{ border-collapse: collapse; width: 100%; margin-bottom: 32px; font-size: 14px; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 8px; text-align: center; }}
+th {{ background: #2C3E50; color: #fff; position: sticky; top: 0; }}
+tbody tr:nth-child(even) {{ background: #F2F4F4; }}
+#search {{ width: 320px; padding: 6px; margin-bottom: 16px; font-size: 14px; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<input id="search" type="search" placeholder="بحث...">
+"""
+
+_HTML_TAIL = """<script>
+document.getElementById('search').addEventListener('input', function () {
+  var needle = this.value.trim();
+  document.querySelectorAll('tbody tr').forEach(function (row) {
+    row.style.display = !needle || row.textContent.indexOf(needle) !== -1 ? '' : 'none';
+  });
+});
+</script>
+</body>
+</html>
+"""
+
+
+def export_html(records_by_section, path, title="تنظيم الخدمه بمبني الخدمات", eastern_numerals=True):
+    """Writes a self-contained right-to-left HTML page with one table per section and a search box."""
+    with open(path, 'w', encoding='utf-8') as handle:
+        handle.write(_HTML_HEAD.format(title=escape(title)))
+        for _, section_title, columns, records in _sections(records_by_section):
+            handle.write(f'<h2>{escape(section_title)}</h2>\n<table>\n<thead><tr>')
+            handle.write(''.join(f'<th>{escape(header)}</th>' for header, _ in columns))
+            handle.write('</tr></thead>\n<tbody>\n')
+            for row in section_rows(records, columns, eastern_numerals):
+                handle.write('<tr>' + ''.join(f'<td>{escape(cell)}</td>' for cell in row) + '</tr>\n')
+            handle.write('</tbody>\n</table>\n')
+        handle.write(_HTML_TAIL)
+    return path
+
+
+def export_records(records_by_section, base_path, formats, stats=None):
+    """
+    Writes the records in every format of `formats` next to base_path
+    (without extension) and returns the written paths.
+    """
+    stats = stats or NO_STATS
+    rows = sum(len(records) for records in records_by_section.values() if hasattr(records, '__len__'))
+    paths = []
+    for export_format in formats:
+        with stats.stage(f'export:{export_format}', rows_in=rows or None):
+            if export_format == 'csv':
+                paths += export_csv(records_by_section, base_path)
+            elif export_format == 'xlsx':
+                paths.append(export_xlsx(records_by_section, base_path + '.xlsx'))
+            elif export_format == 'html':
+                paths.append(export_html(records_by_section, base_path + '.html'))
+            else:
+                raise ValueError(f"unknown export format: {export_format} (expected one of {', '.join(FORMATS)})")
+    return [os.path.abspath(path) for path in paths]
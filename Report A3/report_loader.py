@@ -0,0 +1,33 @@
+import importlib.util
+import os
+import sys
+
+REPORT_DIR = os.path.dirname(os.path.abspath(__file__))
+LANDSCAPE_SCRIPT = os.path.join(REPORT_DIR, 'Booking-Report-maker -Landscape.py')
+MUSIC_ROOM_SCRIPT = os.path.join(os.path.dirname(REPORT_DIR), 'Music Room Report A4', 'Music-Room-Report-A4.py')
+
+
+def load_report_script(path=LANDSCAPE_SCRIPT, module_name='booking_report_landscape'):
+    """
+    Imports one of the report scripts (their file names are not valid module
+    names) and returns it as a module. If the script is the one currently
+    running as __main__, that module is returned instead of loading a copy.
+    """
+    path = os.path.abspath(path)
+    main_module = sys.modules.get('__main__')
+    main_file = getattr(main_module, '__file__', None)
+    if main_file and os.path.abspath(main_file) == path:
+        return main_module
+
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+    return module
@@ -0,0 +1,217 @@
+"""
+Asynchronous fetch-and-merge pipeline for the A3 report.
+
+The booked slots of the date range are fetched in room shards (the slots
+of a few rooms per query) on worker threads with the regular pymongo
+driver, so several shards are on the wire at once. Every shard is
+normalized and its contiguous slots are merged as soon as it arrives, while
+the later shards are still being fetched; the wall time approaches
+max(fetch, compute) instead of their sum. Slots only merge within one room,
+and a weekly series never leaves its room, so merging shard by shard gives
+the same slots (and collapses the same series) as merging everything at
+once.
+
+One extra query, run first, fetches the booked slots no room shard can:
+dates the server cannot range-filter (strings, missing dates, ...) and
+rooms that are not in the room index or stored as strings. They are handed
+to the shard of their room, or merged as a shard of their own.
+"""
+import asyncio
+import contextlib
+import io
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from local_dates import LOCAL_TIMEZONE
+from mongo_client import POOL_SIZE, shared_client
+from report_stats import NO_STATS
+from weekly_series import NO_SERIES
+
+ROOMS_PER_SHARD = 4
+
+# Shard queries in flight at once
+FETCH_CONCURRENCY = 4
+
+
+def room_shards(room_ids, rooms_per_shard=ROOMS_PER_SHARD):
+    """The room ids, sorted, in consecutive groups of rooms_per_shard."""
+    room_ids = sorted(room_ids)
+    return [tuple(room_ids[first:first + rooms_per_shard]) for first in range(0, len(room_ids), rooms_per_shard)]
+
+
+def _local_midnight_utc(day):
+    """The UTC instant (naive, like pymongo expects) at which the Cairo-local day begins."""
+    midnight = datetime(day.year, day.month, day.day, tzinfo=ZoneInfo(LOCAL_TIMEZONE))
+    return midnight.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _date_range(start_date, end_date):
+    return {'$gte': _local_midnight_utc(start_date), '$lt': _local_midnight_utc(end_date + timedelta(days=1))}
+
+
+def _object_ids(room_ids):
+    from bson import ObjectId
+
+    return [ObjectId(room_id) for room_id in room_ids if ObjectId.is_valid(room_id)]
+
+
+def shard_query(room_ids, start_date, end_date):
+    """Query for the booked slots of the rooms room_ids on the local days start_date..end_date."""
+    return {'status': 'booked', 'roomId': {'$in': _object_ids(room_ids)}, 'date': _date_range(start_date, end_date)}
+
+
+def rest_query(room_ids, start_date, end_date):
+    """
+    Query for the booked slots that no shard of room_ids fetches. It may
+    return slots outside the range (unparsed dates); those are filtered
+    locally.
+    """
+    return {'status': 'booked', '$or': [
+        {'date': {'$not': {'$type': 'date'}}},
+        {'date': _date_range(start_date, end_date), 'roomId': {'$nin': _object_ids(room_ids)}},
+    ]}
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Silences the per-shard progress prints of the report functions."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+class ShardedFetch:
+    """
+    Fetches and merges the booked slots of a date range shard by shard.
+    `report` is the loaded A3 report module (frame_from_documents and
+    merge_booked_slots_with_series are used). Without a room index everything is fetched
+    by the one extra query. `fetch_s` and `compute_s` add up the time spent
+    in queries (summed over the shards, so overlapping fetches count in full)
+    and in normalizing and merging once run() returns.
+    """
+
+    def __init__(self, report, collection, start_date, end_date, room_index=None,
+                 rooms_per_shard=ROOMS_PER_SHARD, concurrency=FETCH_CONCURRENCY):
+        self.report = report
+        self.collection = collection
+        self.start_date = start_date
+        self.end_date = end_date
+        self.room_index = room_index
+        self.shards = room_shards(room_index.all_names, rooms_per_shard) if room_index is not None else []
+        self.concurrency = concurrency
+        self.slot_count = 0
+        self.fetch_s = 0.0
+        self.compute_s = 0.0
+
+    async def _fetch(self, semaphore, query, shard=None):
+        async with semaphore:
+            started = time.perf_counter()
+            documents = await asyncio.to_thread(lambda: list(self.collection.find(query)))
+            self.fetch_s += time.perf_counter() - started
+        return shard, documents
+
+    def _merge_shard(self, documents, extra):
+        import pandas as pd
+
+        started = time.perf_counter()
+        frame = self.report.frame_from_documents(documents, self.start_date, self.end_date)
+        if extra is not None and len(extra):
+            frame = pd.concat([frame, extra], ignore_index=True)
+        self.slot_count += len(frame)
+        merged = series = pd.DataFrame()
+        if not frame.empty:
+            merged, series = self.report.merge_booked_slots_with_series(frame, room_index=self.room_index)
+        self.compute_s += time.perf_counter() - started
+        return merged, series
+
+    def _split_rest(self, documents):
+        """The extra query's slots in the range, per shard index (len(shards) for the rest)."""
+        rest = self.report.frame_from_documents(documents, self.start_date, self.end_date)
+        if rest.empty:
+            return {}
+        if not self.shards:
+            return {0: rest}
+        shard_of = {room_id: index for index, shard in enumerate(self.shards) for room_id in shard}
+        owners = self.room_index.room_ids_column(rest)
+        owners = owners.map(shard_of).fillna(len(self.shards)) if owners is not None else len(self.shards)
+        return {int(index): part for index, part in rest.groupby(owners)}
+
+    async def run(self):
+        """
+        The merged slots of the whole range, in merge_booked_slots order, and
+        the weekly series collapsed in them.
+        """
+        import pandas as pd
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        _, documents = await self._fetch(semaphore, rest_query([room for shard in self.shards for room in shard],
+                                                              self.start_date, self.end_date))
+        rest = self._split_rest(documents)
+
+        fetches = [asyncio.ensure_future(self._fetch(semaphore, shard_query(shard, self.start_date, self.end_date), index))
+                   for index, shard in enumerate(self.shards)]
+        parts = []
+        if len(self.shards) in rest:
+            parts.append(await asyncio.to_thread(self._merge_shard, [], rest[len(self.shards)]))
+        for fetched in asyncio.as_completed(fetches):
+            index, documents = await fetched
+            # On a worker thread too, so the event loop keeps starting the queued fetches
+            parts.append(await asyncio.to_thread(self._merge_shard, documents, rest.get(index)))
+
+        parts = [(part, series) for part, series in parts if not part.empty]
+        if not parts:
+            return pd.DataFrame(), pd.DataFrame()
+        # Every shard numbers its weekly series from 0
+        offset = 0
+        for part, series in parts:
+            if len(series):
+                part['series'] = part['series'].where(part['series'] == NO_SERIES, part['series'] + offset)
+                offset += len(series)
+        merged = pd.concat([part for part, _ in parts], ignore_index=True)
+        series = pd.concat([series for _, series in parts if len(series)] or [pd.DataFrame()], ignore_index=True)
+        if 'series' in merged.columns:
+            merged['series'] = merged['series'].fillna(NO_SERIES).astype('int32')
+        return merged.sort_values(['group_key', 'day', 'startTime'], kind='stable', ignore_index=True), series
+
+
+def fetch_and_merge(report, uri, db_name, collection_name, start_date, end_date, stats=None,
+                    rooms_per_shard=ROOMS_PER_SHARD, concurrency=FETCH_CONCURRENCY):
+    """
+    Connects, loads the room index and runs a ShardedFetch over the date
+    range. Returns (merged slots, their weekly series, RoomIndex or None,
+    number of slots).
+    """
+    import pandas as pd
+    from pymongo.errors import PyMongoError
+    from room_index import RoomIndex
+
+    stats = stats or NO_STATS
+    try:
+        print("جارٍ الاتصال بقاعدة البيانات...")
+        client = shared_client(uri, stats, pool_size=max(concurrency + 1, POOL_SIZE))
+
+        room_index = None
+        try:
+            with stats.stage('room-index'):
+                room_index = RoomIndex.from_database(client[db_name])
+        except PyMongoError as exc:
+            print(f"تحذير: تعذر تحميل بيانات الغرف: {exc}")
+
+        pipeline = ShardedFetch(report, client[db_name][collection_name], start_date, end_date,
+                                room_index=room_index, rooms_per_shard=rooms_per_shard, concurrency=concurrency)
+        print(f"جارٍ جلب ودمج الحجوزات على {len(pipeline.shards)} دفعة بالتوازي...")
+        with stats.stage('fetch+merge') as stage:
+            with _quiet():
+                merged, series = asyncio.run(pipeline.run())
+            stage['rows_in'] = pipeline.slot_count
+            stage['rows_out'] = len(merged)
+            stage['shards'] = len(pipeline.shards)
+            stage['fetch_s'] = round(pipeline.fetch_s, 4)
+            stage['compute_s'] = round(pipeline.compute_s, 4)
+    except PyMongoError as exc:
+        print(f"خطأ في الاتصال بقاعدة البيانات: {exc}")
+        return pd.DataFrame(), pd.DataFrame(), None, 0
+
+    print(f"تم جلب {pipeline.slot_count} حجز ودمجها إلى {len(merged)} فترات "
+          f"(استعلامات {pipeline.fetch_s:.2f} ث، معالجة {pipeline.compute_s:.2f} ث).")
+    return merged, series, room_index, pipeline.slot_count
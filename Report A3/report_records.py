@@ -0,0 +1,209 @@
+"""
+Typed output rows of the A3 report.
+
+The records hold raw values only: names, the weekday number, times as
+minutes since midnight and dates as proleptic ordinals. Everything the
+staff read (Arabic day names, 12-hour times, YYYY/MM/DD dates and ranges)
+is formatted when a row is displayed, through small caches keyed by value,
+so a large table formats each distinct time or date once.
+
+`display()` returns the row the way the report used to carry it: a dict
+with the PDF column names and formatted strings.
+"""
+from datetime import date, datetime
+from functools import lru_cache
+from typing import NamedTuple, Tuple, Union
+
+DAY_TRANSLATIONS = {
+    'Saturday': 'السبت', 'Sunday': 'الأحد', 'Monday': 'الاثنين',
+    'Tuesday': 'الثلاثاء', 'Wednesday': 'الأربعاء', 'Thursday': 'الخميس',
+    'Friday': 'الجمعة'
+}
+
+# English day names by Python weekday number (Monday = 0)
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# The tables have always been sorted on the Arabic day name; rank of each weekday in that order
+DAY_SORT_RANK = {
+    weekday: rank
+    for rank, weekday in enumerate(sorted(range(7), key=lambda number: DAY_TRANSLATIONS[WEEKDAY_NAMES[number]]))
+}
+
+# Exception dates listed in one cell; the rest are only counted
+MAX_LISTED_DATES = 6
+
+# A time is minutes since midnight, or the original text when it is not a valid HH:MM
+Time = Union[int, str]
+
+
+def time_code(time_str):
+    """Minutes since midnight of an 'HH:MM' string, or the string itself when it does not parse."""
+    try:
+        parsed = datetime.strptime(time_str, '%H:%M')
+    except (TypeError, ValueError):
+        return time_str
+    return parsed.hour * 60 + parsed.minute
+
+
+@lru_cache(maxsize=None)
+def format_time(code):
+    """'H:MM ص/م' for a time code (no leading zero); text codes are shown as they are."""
+    if isinstance(code, str):
+        return code
+    hours, minutes = divmod(code, 60)
+    return f"{hours % 12 or 12}:{minutes:02d} {'ص' if hours < 12 else 'م'}"
+
+
+@lru_cache(maxsize=None)
+def format_time_range(start, end):
+    return f"{format_time(start)} إلى {format_time(end)}"
+
+
+@lru_cache(maxsize=None)
+def format_date(ordinal):
+    return date.fromordinal(ordinal).strftime('%Y/%m/%d')
+
+
+@lru_cache(maxsize=None)
+def format_date_range(first, last):
+    """One date, or 'first إلى last' when they differ."""
+    if first == last:
+        return format_date(first)
+    return f"{format_date(first)} إلى {format_date(last)}"
+
+
+def _date_list(ordinals):
+    listed = '، '.join(format_date(ordinal) for ordinal in ordinals[:MAX_LISTED_DATES])
+    if len(ordinals) > MAX_LISTED_DATES:
+        listed += f" و{len(ordinals) - MAX_LISTED_DATES} أخرى"
+    return listed
+
+
+@lru_cache(maxsize=None)
+def format_exceptions(missing, extra):
+    """'عدا X، Y؛ وأيضًا Z' for the skipped weeks and extra dates of a recurring booking; '' without any."""
+    parts = []
+    if missing:
+        parts.append(f"عدا {_date_list(missing)}")
+    if extra:
+        parts.append(f"وأيضًا {_date_list(extra)}")
+    return '؛ '.join(parts)
+
+
+def format_series_dates(first, last, missing, extra):
+    """The date range of a recurring booking followed by its exceptions in parentheses."""
+    exceptions = format_exceptions(missing, extra)
+    dates = format_date_range(first, last)
+    return f"{dates} ({exceptions})" if exceptions else dates
+
+
+def format_day(weekday):
+    name = WEEKDAY_NAMES[weekday]
+    return DAY_TRANSLATIONS.get(name, name)
+
+
+class RecurringBooking(NamedTuple):
+    room: str
+    service: str
+    provider: str
+    weekday: int
+    start: Time
+    end: Time
+    first_date: int
+    last_date: int
+    booking_count: int
+    # Weeks between first_date and last_date without the booking, and bookings moved to other days
+    missing_dates: Tuple[int, ...] = ()
+    extra_dates: Tuple[int, ...] = ()
+
+    def display(self):
+        return {
+            'Room': self.room,
+            'Service': self.service,
+            'Provider': self.provider,
+            'Day': format_day(self.weekday),
+            'Time': format_time_range(self.start, self.end),
+            'Start Date': format_date(self.first_date),
+            'End Date': format_date(self.last_date),
+            'Booking Count': self.booking_count,
+            'Exceptions': format_exceptions(self.missing_dates, self.extra_dates),
+        }
+
+
+class OneTimeBooking(NamedTuple):
+    room: str
+    service: str
+    provider: str
+    date: int
+    start: Time
+    end: Time
+
+    def display(self):
+        return {
+            'Room': self.room,
+            'Service': self.service,
+            'Provider': self.provider,
+            'Date': format_date(self.date),
+            'Time': format_time_range(self.start, self.end),
+        }
+
+
+class LocationGroup(NamedTuple):
+    rooms: str
+    service: str
+    provider: str
+    weekday: int
+    start: Time
+    end: Time
+    first_date: int
+    last_date: int
+    booking_count: int
+
+    def display(self):
+        return {
+            'Rooms': self.rooms,
+            'Service': self.service,
+            'Provider': self.provider,
+            'Day': format_day(self.weekday),
+            'Date': format_date_range(self.first_date, self.last_date),
+            'Time': format_time_range(self.start, self.end),
+            'Count': self.booking_count,
+        }
+
+
+class RoomGroupBooking(NamedTuple):
+    group: str
+    rooms: str
+    service: str
+    provider: str
+    weekday: int
+    start: Time
+    end: Time
+    first_date: int
+    last_date: int
+    booking_count: int
+
+    def display(self):
+        return {
+            'Group': self.group,
+            'Rooms': self.rooms,
+            'Service': self.service,
+            'Provider': self.provider,
+            'Day': format_day(self.weekday),
+            'Time': format_time_range(self.start, self.end),
+            'Date': format_date_range(self.first_date, self.last_date),
+            'Count': self.booking_count,
+        }
+
+
+def recurring_sort_key(record):
+    return record.room, DAY_SORT_RANK[record.weekday], record.first_date
+
+
+def one_time_sort_key(record):
+    return record.room, record.date
+
+
+def location_group_sort_key(record):
+    return (record.service, format_date_range(record.first_date, record.last_date),
+            format_time_range(record.start, record.end))
@@ -0,0 +1,354 @@
+"""
+Long-running report service exposing the Python report pipeline over HTTP.
+
+The process keeps one pooled MongoDB client, the registered Arabic font and a
+snapshot of all booked slots warm, so a report request only pays for
+processing and PDF layout. Requests are queued and built one at a time.
+
+Usage:
+    python report_service.py --port 8765
+
+    GET /reports/a3-landscape?start=2025-09-01&end=2025-12-31
+    GET /reports/music-room-a4?start=01.09.2025&end=31.12.2025
+    GET /free-rooms?weekday=Thursday&from=18:00&to=20:00&start=2025-10-02&weeks=10&group=المنارات
+    GET /health
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+from pymongo.errors import PyMongoError
+
+from free_rooms import FreeRoomFinder, parse_weekday, query_dates
+from mongo_client import get_client
+from report_loader import MUSIC_ROOM_SCRIPT, REPORT_DIR, load_report_script
+from room_index import RoomIndex
+
+DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y")
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _no_log(*args, **kwargs):
+    """The `log` of the report functions: keeps their per-row progress messages out of the service log."""
+
+
+def _parse_date(value):
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _render_landscape(frame, room_index):
+    report = load_report_script()
+    recurring, onetime, grouped = report.process_bookings(frame, room_index=room_index, log=_no_log)
+    sections = report.sort_report_sections(recurring, onetime, grouped)
+    buffer = io.BytesIO()
+    report.create_pdf(*sections, output_filename=buffer, log=_no_log)
+    return buffer.getvalue()
+
+
+def _render_music_room(frame, room_index):
+    report = load_report_script(MUSIC_ROOM_SCRIPT, 'music_room_report')
+    recurring = report.process_bookings_for_music_room(frame, room_index=room_index, log=_no_log)
+    if not recurring:
+        return b''
+    recurring_sorted = sorted(recurring, key=lambda x: (x['Day'], x['Time'], x['Date']))
+    buffer = io.BytesIO()
+    report.create_pdf(recurring_sorted, output_filename=buffer, log=_no_log)
+    return buffer.getvalue()
+
+
+REPORTS = {
+    'a3-landscape': _render_landscape,
+    'music-room-a4': _render_music_room,
+}
+
+
+class SlotSnapshot:
+    """
+    All booked slots, already date- and column-normalized and named from
+    the rooms collection (`room_index`), refreshed in the background through
+    a pooled client so requests never wait on Atlas. The FreeRoomFinder of
+    the slots is rebuilt by the refresh too and swapped in with them.
+    """
+
+    def __init__(self, client, db_name, collection_name, refresh_seconds=60):
+        self.database = client[db_name]
+        self.collection = self.database[collection_name]
+        self.refresh_seconds = refresh_seconds
+        self.lock = threading.Lock()
+        self.frame = pd.DataFrame()
+        self.room_index = None
+        self.finder = None
+        self.version = 0
+        self.loaded_at = None
+
+    def refresh(self):
+        """Fetches the rooms and booked slots again; bumps the version only if they changed."""
+        report = load_report_script()
+        room_index = RoomIndex.from_database(self.database)
+        documents = list(self.collection.find({"status": "booked"}))
+        frame = report.frame_from_documents(documents, None, None, log=_no_log)
+        if not frame.empty:
+            # Slots only store a roomId; name them before the missing names default to 'غير محدد'
+            frame = report.normalize_booking_columns(room_index.add_room_names(frame))
+        # Only the refresh thread replaces the snapshot, so it can compare without the lock
+        rooms_changed = (self.room_index is None
+                         or (room_index.all_names, room_index.names, room_index.groups)
+                         != (self.room_index.all_names, self.room_index.names, self.room_index.groups))
+        changed = rooms_changed or not frame.equals(self.frame)
+        finder = self.finder
+        if changed:
+            merged = report.merge_booked_slots(frame, room_index=room_index, log=_no_log)
+            # Disabled rooms cannot be booked, so they are never offered as free
+            finder = FreeRoomFinder(room_index.without_disabled_rooms(merged), rooms=room_index.names.values())
+        with self.lock:
+            if changed:
+                self.frame = frame
+                self.room_index = room_index
+                self.finder = finder
+                self.version += 1
+            self.loaded_at = time.time()
+
+    def between(self, start_date, end_date):
+        """Returns (frame, room index, version) for the slots within the date range."""
+        with self.lock:
+            frame, room_index, version = self.frame, self.room_index, self.version
+        if frame.empty or 'day' not in frame.columns:
+            return pd.DataFrame(), room_index, version
+        mask = frame['day'].between(start_date.toordinal(), end_date.toordinal())
+        return frame[mask].reset_index(drop=True), room_index, version
+
+    def _refresh_forever(self):
+        while True:
+            time.sleep(self.refresh_seconds)
+            try:
+                self.refresh()
+            except PyMongoError as exc:
+                print(f"تعذر تحديث البيانات من قاعدة البيانات: {exc}")
+
+    def start(self):
+        self.refresh()
+        threading.Thread(target=self._refresh_forever, name='snapshot-refresh', daemon=True).start()
+
+
+class QueueFullError(Exception):
+    """Raised when more requests are waiting than the service accepts."""
+
+
+class ReportService:
+    """
+    Builds reports from the snapshot on a single worker thread. Results are
+    cached per (report, range, snapshot version), so repeated downloads of an
+    unchanged report skip the build entirely.
+    """
+
+    def __init__(self, snapshot, max_queue=8, cache_size=16):
+        self.snapshot = snapshot
+        self.max_queue = max_queue
+        self.cache_size = cache_size
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='report')
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.cache = OrderedDict()
+
+    def free_rooms(self, dates, start_time, end_time, group=None):
+        """Names of the rooms (of the group, when given) free for the whole window on every date."""
+        with self.snapshot.lock:
+            room_index, finder = self.snapshot.room_index, self.snapshot.finder
+        rooms = None
+        if group:
+            if room_index is None:
+                raise ValueError("room groups are not available")
+            room_ids = room_index.room_ids_matching([group])
+            if not room_ids:
+                raise ValueError(f"no room or room group matches: {group}")
+            rooms = [room_index.names[room_id] for room_id in room_ids if room_id in room_index.names]
+        return finder.free_rooms(dates, start_time, end_time, rooms=rooms)
+
+    def _build(self, kind, start_date, end_date):
+        frame, room_index, version = self.snapshot.between(start_date, end_date)
+        key = (kind, start_date, end_date, version)
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+
+        started = time.perf_counter()
+        if frame.empty:
+            pdf_bytes = b''
+        else:
+            pdf_bytes = REPORTS[kind](frame, room_index)
+        print(f"[{datetime.now():%H:%M:%S}] {kind} {start_date} → {end_date}: "
+             f"{len(frame)} slots, {len(pdf_bytes)} bytes in {time.perf_counter() - started:.2f}s")
+
+        with self.lock:
+            self.cache[key] = pdf_bytes
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return pdf_bytes
+
+    def render(self, kind, start_date, end_date):
+        """Queues a report build and waits for its PDF bytes (empty when there is no data)."""
+        with self.lock:
+            if self.queued >= self.max_queue:
+                raise QueueFullError()
+            self.queued += 1
+        try:
+            return self.executor.submit(self._build, kind, start_date, end_date).result()
+        finally:
+            with self.lock:
+                self.queued -= 1
+
+
+def make_handler(service):
+    class ReportRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/health':
+                snapshot = service.snapshot
+                self._send_json(200, {
+                    'status': 'ok',
+                    'slots': len(snapshot.frame),
+                    'snapshotVersion': snapshot.version,
+                    'snapshotAge': None if snapshot.loaded_at is None else round(time.time() - snapshot.loaded_at, 1),
+                    'queued': service.queued,
+                })
+                return
+
+            if url.path == '/free-rooms':
+                self._free_rooms(parse_qs(url.query))
+                return
+
+            kind = url.path[len('/reports/'):] if url.path.startswith('/reports/') else None
+            if kind not in REPORTS:
+                self._send_json(404, {'error': f'Unknown report. Available: {", ".join(sorted(REPORTS))}'})
+                return
+
+            query = parse_qs(url.query)
+            start_date = _parse_date(query.get('start', [None])[0])
+            end_date = _parse_date(query.get('end', [None])[0])
+            if start_date is None or end_date is None:
+                self._send_json(400, {'error': 'start and end are required (format: YYYY-MM-DD or DD.MM.YYYY)'})
+                return
+            if start_date > end_date:
+                self._send_json(400, {'error': 'start must be before or equal to end'})
+                return
+
+            try:
+                pdf_bytes = service.render(kind, start_date, end_date)
+            except QueueFullError:
+                self._send_json(503, {'error': 'Too many reports are queued, try again shortly'})
+                return
+            except Exception as exc:
+                self._send_json(500, {'error': f'{type(exc).__name__}: {exc}'})
+                return
+
+            if not pdf_bytes:
+                self._send_json(404, {'error': 'No booked slots found in the specified date range'})
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/pdf')
+            self.send_header('Content-Length', str(len(pdf_bytes)))
+            self.send_header('Content-Disposition', f'attachment; filename=Booking_Report_{start_date}_{end_date}.pdf')
+            self.end_headers()
+            view = memoryview(pdf_bytes)
+            for offset in range(0, len(view), STREAM_CHUNK_SIZE):
+                self.wfile.write(view[offset:offset + STREAM_CHUNK_SIZE])
+
+        def _free_rooms(self, query):
+            def param(name):
+                return query.get(name, [None])[0]
+
+            started = time.perf_counter()
+            start_date = _parse_date(param('start')) if param('start') else datetime.now().date()
+            end_date = _parse_date(param('end')) if param('end') else None
+            if start_date is None or (param('end') and end_date is None):
+                self._send_json(400, {'error': 'start and end must be YYYY-MM-DD or DD.MM.YYYY'})
+                return
+            if not param('from') or not param('to'):
+                self._send_json(400, {'error': 'from and to are required (HH:MM)'})
+                return
+            try:
+                weekday = parse_weekday(param('weekday')) if param('weekday') else None
+                weeks = int(param('weeks') or 1)
+                dates = query_dates(start_date, end_date, weekday, weeks)
+                rooms = service.free_rooms(dates, param('from'), param('to'), group=param('group'))
+            except ValueError as exc:
+                self._send_json(400, {'error': str(exc)})
+                return
+            self._send_json(200, {
+                'rooms': rooms,
+                'dates': [day.isoformat() for day in dates],
+                'from': param('from'),
+                'to': param('to'),
+                'queryMs': round((time.perf_counter() - started) * 1000, 2),
+            })
+
+        def log_message(self, format, *args):
+            return
+
+    return ReportRequestHandler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serves the booking reports over HTTP from a warm process.")
+    parser.add_argument('--host', default=os.getenv('REPORT_SERVICE_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('REPORT_SERVICE_PORT', '8765')))
+    parser.add_argument('--refresh', type=float, default=60.0, help="seconds between snapshot refreshes")
+    parser.add_argument('--max-queue', type=int, default=8, help="requests allowed to wait for a build")
+    parser.add_argument('--pool-size', type=int, default=4, help="MongoDB connection pool size")
+    args = parser.parse_args(argv)
+
+    # Fonts and the logo are looked up relative to the working directory, like the scripts do
+    os.chdir(REPORT_DIR)
+    report = load_report_script()
+    mongo_uri, db_name, collection_name = report.get_mongo_settings()
+    report._register_arabic_font()
+
+    try:
+        client = get_client(mongo_uri, pool_size=args.pool_size)
+        snapshot = SlotSnapshot(client, db_name, collection_name, refresh_seconds=args.refresh)
+        print("جارٍ تحميل الحجوزات المؤكدة...")
+        snapshot.start()
+    except PyMongoError as exc:
+        print(f"خطأ في الاتصال بقاعدة البيانات: {exc}")
+        sys.exit(1)
+    print(f"تم تحميل {len(snapshot.frame)} حجز و{len(snapshot.room_index.names)} غرفة.")
+
+    service = ReportService(snapshot, max_queue=args.max_queue)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"خدمة التقارير تعمل على http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nتم إيقاف خدمة التقارير.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
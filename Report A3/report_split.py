@@ -0,0 +1,211 @@
+"""
+Splitting the A3 report into bounded PDF parts.
+
+A single doc.build over a long date range lays out every row on one core
+and keeps all of its flowables in memory until the file is written. The
+report sections can instead be divided into parts: one per room, one per
+month, or consecutive runs of rows. Every part is then cut again until no
+part holds more than max_rows table rows. The parts are rendered in worker
+processes and either kept as separate files or merged into one PDF with a
+bookmark per part (merging needs pypdf).
+
+Sections are passed around as a dict keyed by the create_pdf keyword they
+are given to, so a part renders with create_pdf(**part.sections).
+"""
+import contextlib
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import NamedTuple
+
+from report_stats import NO_STATS
+
+SPLIT_MODES = ('auto', 'none', 'room', 'month', 'rows')
+
+# The size above which create_pdf has always warned that a build takes minutes
+MAX_ROWS = 1000
+
+# Table sections in the order create_pdf prints them; 'utilization' (one row per room) is never cut
+TABLE_SECTIONS = ('recurring_data', 'one_time_data', 'grouped_by_location_data', 'room_group_data', 'conflict_data')
+
+
+class ReportPart(NamedTuple):
+    title: str      # shown under the report header and used as the bookmark
+    slug: str       # suffix of the part's file name
+    sections: dict  # create_pdf keyword -> records
+
+
+def table_rows(sections):
+    return sum(len(sections.get(key) or ()) for key in TABLE_SECTIONS)
+
+
+def _days(record):
+    """First and last day ordinal a record covers."""
+    if isinstance(record, dict):  # conflicts
+        day = date.fromisoformat(record['date']).toordinal()
+        return day, day
+    if hasattr(record, 'date'):
+        return record.date, record.date
+    return record.first_date, record.last_date
+
+
+def _room(record):
+    return record['room'] if isinstance(record, dict) else record.room
+
+
+def _slug(text):
+    return re.sub(r'[^\w-]+', '_', str(text)).strip('_') or 'part'
+
+
+def _non_empty(sections):
+    return {key: records for key, records in sections.items() if records}
+
+
+def by_room(sections):
+    """
+    One part per room with its recurring, one-time and conflicting bookings,
+    then one part with the sections that span several rooms.
+    """
+    per_room = ('recurring_data', 'one_time_data', 'conflict_data')
+    by_name = {}
+    for key in per_room:
+        for record in sections.get(key) or ():
+            by_name.setdefault(_room(record), {}).setdefault(key, []).append(record)
+    rooms = sorted(by_name)
+    parts = [ReportPart(f"الغرفة: {room}", f"{number:03d}-{_slug(room)}", by_name[room])
+             for number, room in enumerate(rooms, 1)]
+    shared = _non_empty({key: records for key, records in sections.items() if key not in per_room})
+    if shared:
+        parts.append(ReportPart("الحجوزات متعددة الأماكن", f"{len(rooms) + 1:03d}-shared", shared))
+    return parts
+
+
+def _months(first, last):
+    """(year, month, first ordinal, last ordinal) of every month from ordinal first to last."""
+    months = []
+    year, month = date.fromordinal(first).year, date.fromordinal(first).month
+    while date(year, month, 1).toordinal() <= last:
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        months.append((year, month, date(year, month, 1).toordinal(), date(next_year, next_month, 1).toordinal() - 1))
+        year, month = next_year, next_month
+    return months
+
+
+def by_month(sections):
+    """
+    One part per calendar month. A booking appears in every month its dates
+    touch, so a weekly booking is listed (with its full counts) in each
+    month it runs in. Utilization covers the whole period and gets its own part.
+    """
+    spans = {key: [(*_days(record), record) for record in sections.get(key) or ()] for key in TABLE_SECTIONS}
+    days = [day for key in TABLE_SECTIONS for span in spans[key] for day in span[:2]]
+    parts = []
+    if days:
+        for year, month, first, last in _months(min(days), max(days)):
+            month_sections = _non_empty({
+                key: [record for first_day, last_day, record in spans[key] if first_day <= last and last_day >= first]
+                for key in TABLE_SECTIONS
+            })
+            if month_sections:
+                parts.append(ReportPart(f"شهر {year}/{month:02d}", f"{year}-{month:02d}", month_sections))
+    if sections.get('utilization') is not None:
+        parts.append(ReportPart("نسبة الإشغال", 'utilization', {'utilization': sections['utilization']}))
+    return parts
+
+
+def by_rows(sections, max_rows=MAX_ROWS, title=None, slug='part'):
+    """Consecutive runs of at most max_rows table rows, in print order; utilization goes with the last run."""
+    chunks = [{}]
+    room_left = max_rows
+    for key in TABLE_SECTIONS:
+        records = list(sections.get(key) or ())
+        while records:
+            if room_left == 0:
+                chunks.append({})
+                room_left = max_rows
+            chunks[-1][key], records = records[:room_left], records[room_left:]
+            room_left -= len(chunks[-1][key])
+    if sections.get('utilization') is not None:
+        chunks[-1]['utilization'] = sections['utilization']
+
+    parts = []
+    for number, chunk in enumerate(chunks, 1):
+        if not chunk:
+            continue
+        numbering = f"الجزء {number} من {len(chunks)}"
+        parts.append(ReportPart(f"{title} ({numbering})" if title else numbering,
+                                f"{slug}-{number:02d}" if len(chunks) > 1 else slug, chunk))
+    return parts
+
+
+def split_report(sections, mode='auto', max_rows=MAX_ROWS):
+    """
+    The report divided into parts of at most max_rows table rows. 'auto'
+    keeps a report that fits the budget whole and otherwise splits by rows;
+    'none' never splits.
+    """
+    if mode == 'none' or (mode == 'auto' and table_rows(sections) <= max_rows):
+        return [ReportPart('', '', sections)]
+    if mode in ('auto', 'rows'):
+        return by_rows(sections, max_rows)
+    parts = by_room(sections) if mode == 'room' else by_month(sections)
+    bounded = []
+    for part in parts:
+        if table_rows(part.sections) > max_rows:
+            bounded.extend(by_rows(part.sections, max_rows, title=part.title, slug=part.slug))
+        else:
+            bounded.append(part)
+    return bounded
+
+
+def _render_part(part, output_filename):
+    """Worker: renders one part with the report script's create_pdf, without its progress output."""
+    from report_loader import load_report_script
+
+    report = load_report_script()
+    with contextlib.redirect_stdout(io.StringIO()):
+        arguments = {key: part.sections.get(key) for key in TABLE_SECTIONS + ('utilization',)}
+        report.create_pdf(output_filename=output_filename, subtitle=part.title, **arguments)
+    return output_filename
+
+
+def merge_pdfs(paths, titles, output_filename):
+    """Concatenates the part PDFs into output_filename with one bookmark per part."""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for path, title in zip(paths, titles):
+        writer.append(path, outline_item=title)
+    with open(output_filename, 'wb') as handle:
+        writer.write(handle)
+
+
+def render_parts(parts, output_filename, merge=True, jobs=None, stats=None):
+    """
+    Renders the parts in parallel as <name>_<slug>.pdf. With merge they are
+    combined into output_filename and removed; when pypdf is not installed
+    the separate files are kept. Returns the paths written.
+    """
+    stats = stats or NO_STATS
+    base, extension = os.path.splitext(output_filename)
+    paths = [f"{base}_{part.slug}{extension}" for part in parts]
+
+    with stats.stage('pdf-parts', rows_in=sum(table_rows(part.sections) for part in parts)) as stage:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            list(pool.map(_render_part, parts, paths))
+        stage['parts'] = len(parts)
+
+    if not merge:
+        return paths
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        print("  - تحذير: مكتبة pypdf غير مثبتة، تم حفظ الأجزاء كملفات منفصلة (pip install pypdf).")
+        return paths
+    with stats.stage('pdf-merge', rows_in=len(parts)):
+        merge_pdfs(paths, [part.title for part in parts], output_filename)
+    for path in paths:
+        os.remove(path)
+    return [output_filename]
@@ -0,0 +1,176 @@
+"""
+Per-stage instrumentation for the report pipeline.
+
+Each stage records wall time, CPU time, rows in/out and peak memory. The
+results can be written as JSON or printed as a summary table. With a profile
+directory every stage also runs under cProfile and, when memory is traced,
+its largest allocations are written next to the profile. Only the
+standard library is used, and json/tracemalloc are only imported once they
+are needed, so importing this module does not slow down the scripts' startup.
+"""
+import contextlib
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _peak_rss_mb():
+    """Process-wide resident memory high-water mark, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / divisor, 1)
+
+
+# Allocation sites listed per stage in the .alloc.txt files
+ALLOCATION_TOP = 25
+
+
+class PipelineStats:
+    """
+    Collects one record per pipeline stage.
+
+    With trace_memory=True the peak Python allocation of every stage is
+    measured with tracemalloc, which is exact but slows the run down; the
+    process RSS high-water mark is always recorded where the OS provides it.
+
+    With profile_dir set, each stage writes NN-<stage>.prof (and
+    NN-<stage>.alloc.txt when tracing memory) into that directory.
+    """
+
+    def __init__(self, trace_memory=False, profile_dir=None):
+        self.trace_memory = trace_memory
+        self.profile_dir = profile_dir
+        self.stages = []
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def _stage_path(self, name, suffix):
+        file_name = f"{len(self.stages) + 1:02d}-{name.replace(':', '-')}{suffix}"
+        return os.path.join(self.profile_dir, file_name)
+
+    @contextlib.contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Measures the enclosed block. The yielded dict can be updated with
+        'rows_out' (and any extra details) before the block ends.
+        """
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': None}
+        started_tracing = False
+        if self.trace_memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+            if self.profile_dir:
+                snapshot_before = tracemalloc.take_snapshot()
+
+        profiler = None
+        if self.profile_dir:
+            import cProfile
+            profiler = cProfile.Profile()
+
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record['wall_s'] = round(time.perf_counter() - wall_started, 4)
+            record['cpu_s'] = round(time.process_time() - cpu_started, 4)
+            record['peak_rss_mb'] = _peak_rss_mb()
+            if profiler is not None:
+                record['profile'] = self._stage_path(name, '.prof')
+                profiler.dump_stats(record['profile'])
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                record['peak_alloc_mb'] = round((peak - traced_before) / (1024 * 1024), 2)
+                if self.profile_dir:
+                    record['allocations'] = self._stage_path(name, '.alloc.txt')
+                    top = tracemalloc.take_snapshot().compare_to(snapshot_before, 'lineno')[:ALLOCATION_TOP]
+                    with open(record['allocations'], 'w', encoding='utf-8') as handle:
+                        handle.write('\n'.join(str(difference) for difference in top) + '\n')
+                if started_tracing:
+                    tracemalloc.stop()
+            self.stages.append(record)
+
+    def as_dict(self):
+        return {
+            'total_wall_s': round(sum(record['wall_s'] for record in self.stages), 4),
+            'total_cpu_s': round(sum(record['cpu_s'] for record in self.stages), 4),
+            'stages': self.stages,
+        }
+
+    def write_json(self, path):
+        import json
+
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(self.as_dict(), handle, ensure_ascii=False, indent=2)
+
+    def summary_table(self):
+        memory_column = 'peak_alloc_mb' if self.trace_memory else 'peak_rss_mb'
+        memory_title = 'alloc MB' if self.trace_memory else 'RSS MB'
+        total_wall = sum(record['wall_s'] for record in self.stages) or 1.0
+
+        def cell(value, width, digits=None):
+            if value is None:
+                return f"{'-':>{width}}"
+            if digits is None:
+                return f"{value:>{width}}"
+            return f"{value:>{width}.{digits}f}"
+
+        lines = [f"{'stage':<20}{'wall s':>9}{'cpu s':>9}{'share':>7}{'rows in':>10}{'rows out':>10}{memory_title:>10}"]
+        for record in self.stages:
+            lines.append(
+                f"{record['stage']:<20}"
+                f"{cell(record['wall_s'], 9, 3)}"
+                f"{cell(record['cpu_s'], 9, 3)}"
+                f"{record['wall_s'] / total_wall * 100:>6.0f}%"
+                f"{cell(record['rows_in'], 10)}"
+                f"{cell(record['rows_out'], 10)}"
+                f"{cell(record.get(memory_column), 10, 1)}"
+            )
+        summary = self.as_dict()
+        lines.append(f"{'total':<20}{summary['total_wall_s']:>9.3f}{summary['total_cpu_s']:>9.3f}")
+        return '\n'.join(lines)
+
+
+    def hot_functions(self, limit=20):
+        """
+        Merges the stage profiles into pipeline.prof and returns the functions
+        with the most own time across the whole run as printable text.
+        """
+        import io
+        import pstats
+
+        paths = [record['profile'] for record in self.stages if record.get('profile')]
+        if not paths:
+            return ''
+        buffer = io.StringIO()
+        merged = pstats.Stats(*paths, stream=buffer)
+        merged.dump_stats(os.path.join(self.profile_dir, 'pipeline.prof'))
+        merged.strip_dirs().sort_stats('tottime').print_stats(limit)
+        return buffer.getvalue()
+
+
+class _NoStats:
+    """Stand-in used when no stats are requested; stages cost nothing."""
+
+    @contextlib.contextmanager
+    def stage(self, name, rows_in=None):
+        yield {}
+
+
+NO_STATS = _NoStats()
@@ -0,0 +1,313 @@
+"""
+Watch mode for the A3 landscape report.
+
+Subscribes to a change stream on the slots, rooms and room groups
+collections, keeps the processed report records in memory and rewrites the
+PDF shortly after bookings change, rebuilding only the table sections whose
+records actually changed. Slots only store a roomId, so they are named from
+a RoomIndex; a change to the rooms reloads the index and the slots.
+
+Usage:
+    python report_watch.py --start 01.09.2025 --end 31.12.2025
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import pandas as pd
+from pymongo.errors import OperationFailure, PyMongoError
+
+from mongo_client import get_client
+from report_loader import load_report_script
+from room_index import ROOM_GROUPS_COLLECTION, ROOMS_COLLECTION, RoomIndex
+
+SECTIONS = ('recurring', 'one_time', 'grouped')
+
+WATCHED_OPERATIONS = ['insert', 'update', 'replace', 'delete']
+
+# Changes to these collections rename rooms rather than touch a slot
+ROOM_COLLECTIONS = (ROOMS_COLLECTION, ROOM_GROUPS_COLLECTION)
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Silences the progress prints of the report functions for small updates."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+class BookingModel:
+    """
+    In-memory copy of the booked slots of one date range together with the
+    processed report records, kept per (service, provider) partition.
+
+    Merging, recurrence detection and location grouping never look across two
+    different service/provider pairs, so a change only has to reprocess the
+    partition it touches. `rooms_changed` is set by a change to the rooms or
+    room groups; the caller then reloads the room index and the slots.
+    """
+
+    def __init__(self, report, start_date, end_date, room_index=None):
+        self.report = report
+        self.start_date = start_date
+        self.end_date = end_date
+        self.room_index = room_index
+        self.rooms_changed = False
+        self.rows = {}
+        self.partitions = defaultdict(set)
+        self.results = {}
+        self.dirty = set()
+
+    def _normalize(self, documents):
+        """Turns raw slot documents into normalized rows, dropping unbooked or out-of-range ones."""
+        with _quiet():
+            df = self.report.frame_from_documents(documents, self.start_date, self.end_date)
+            if df.empty:
+                return []
+            if 'status' in df.columns:
+                df = df[df['status'] == 'booked']
+            if df.empty:
+                return []
+            if self.room_index is not None:
+                df = self.room_index.add_room_names(df)
+            df = self.report.normalize_booking_columns(df)
+        return df.to_dict('records')
+
+    def _put(self, row):
+        self._drop(row['_id'])
+        key = (row['serviceName'], row['providerName'])
+        self.rows[row['_id']] = (key, row)
+        self.partitions[key].add(row['_id'])
+        self.dirty.add(key)
+
+    def _drop(self, slot_id):
+        entry = self.rows.pop(slot_id, None)
+        if entry is None:
+            return False
+        key = entry[0]
+        self.partitions[key].discard(slot_id)
+        if not self.partitions[key]:
+            del self.partitions[key]
+        self.dirty.add(key)
+        return True
+
+    def load(self, documents):
+        """
+        Replaces the model contents with the given documents. The whole set is
+        processed once and the records are split into partitions afterwards,
+        which is much cheaper than processing every partition on its own.
+        """
+        self.rows.clear()
+        self.partitions.clear()
+        self.results.clear()
+        self.dirty.clear()
+        self.rooms_changed = False
+
+        rows = self._normalize(documents)
+        for row in rows:
+            self._put(row)
+        self.dirty.clear()
+        if not rows:
+            return
+
+        recurring, one_time, grouped = self.report.process_bookings(pd.DataFrame(rows))
+        buckets = defaultdict(lambda: ([], [], []))
+        for section_index, records in enumerate((recurring, one_time, grouped)):
+            for record in records:
+                buckets[(record.service, record.provider)][section_index].append(record)
+        self.results = {key: buckets[key] for key in self.partitions}
+
+    def apply_change(self, change):
+        """
+        Applies one change stream event. Returns True if the model changed.
+        """
+        if (change.get('ns') or {}).get('coll') in ROOM_COLLECTIONS:
+            self.rooms_changed = True
+            return True
+
+        operation = change.get('operationType')
+        slot_id = str((change.get('documentKey') or {}).get('_id'))
+
+        if operation == 'delete':
+            return self._drop(slot_id)
+
+        if operation in ('insert', 'update', 'replace'):
+            document = change.get('fullDocument')
+            rows = self._normalize([document]) if document is not None else []
+            if rows:
+                self._put(rows[0])
+                return True
+            # Deleted before the update lookup ran, no longer booked, or moved out of range
+            return self._drop(slot_id)
+
+        return False
+
+    def refresh(self):
+        """
+        Reprocesses the dirty partitions and returns the sorted
+        (recurring, one_time, grouped) report sections.
+        """
+        for key in sorted(self.dirty):
+            slot_ids = self.partitions.get(key)
+            if not slot_ids:
+                self.results.pop(key, None)
+                continue
+            frame = pd.DataFrame([self.rows[slot_id][1] for slot_id in sorted(slot_ids)])
+            with _quiet():
+                self.results[key] = self.report.process_bookings(frame)
+        self.dirty.clear()
+
+        recurring, one_time, grouped = [], [], []
+        for key in sorted(self.results):
+            partition_recurring, partition_one_time, partition_grouped = self.results[key]
+            recurring.extend(partition_recurring)
+            one_time.extend(partition_one_time)
+            grouped.extend(partition_grouped)
+        return self.report.sort_report_sections(recurring, one_time, grouped)
+
+
+class ReportWatcher:
+    """
+    Re-renders the PDF from a BookingModel, skipping the build when no section
+    changed and reusing the table rows of the sections that stayed the same.
+    """
+
+    def __init__(self, model, output_filename):
+        self.model = model
+        self.output_filename = output_filename
+        self.section_cache = {}
+        self.sections = (None, None, None)
+
+    def refresh(self):
+        sections = self.model.refresh()
+        changed = [name for name, old, new in zip(SECTIONS, self.sections, sections) if old != new]
+        if not changed:
+            print(f"[{datetime.now():%H:%M:%S}] لا توجد تغييرات تؤثر على التقرير.")
+            return []
+
+        for name in changed:
+            self.section_cache.pop(name, None)
+        self.sections = sections
+
+        print(f"[{datetime.now():%H:%M:%S}] جارٍ تحديث التقرير (الأقسام المتغيرة: {', '.join(changed)})...")
+        # Build into a temporary file so nobody opens a half-written report
+        temp_filename = self.output_filename + '.tmp'
+        self.model.report.create_pdf(*sections, output_filename=temp_filename, section_cache=self.section_cache)
+        if os.path.exists(temp_filename):
+            os.replace(temp_filename, self.output_filename)
+        return changed
+
+
+def run_watch_loop(stream, model, on_refresh, debounce_seconds=2.0, max_delay_seconds=30.0, clock=time.monotonic):
+    """
+    Feeds change events from stream into model and calls on_refresh once the
+    feed has been quiet for debounce_seconds, or max_delay_seconds after the
+    first pending change if it never goes quiet.
+
+    stream only needs try_next() and an alive attribute (a pymongo
+    ChangeStream), so a mocked feed can drive the loop as well.
+    """
+    first_pending = None
+    last_change = None
+
+    while stream.alive:
+        change = stream.try_next()
+        now = clock()
+        if change is not None and model.apply_change(change):
+            if first_pending is None:
+                first_pending = now
+            last_change = now
+
+        if first_pending is None:
+            continue
+        quiet = change is None and now - last_change >= debounce_seconds
+        if quiet or now - first_pending >= max_delay_seconds:
+            on_refresh()
+            first_pending = None
+            last_change = None
+
+    if first_pending is not None:
+        on_refresh()
+
+
+def watch_report(uri, db_name, collection_name, start_date, end_date, output_filename, debounce_seconds=2.0):
+    """
+    Loads the booked slots of the date range, renders the report and keeps it
+    up to date from the slots change stream until interrupted.
+    """
+    report = load_report_script()
+    model = BookingModel(report, start_date, end_date)
+    watcher = ReportWatcher(model, output_filename)
+    # One database-level stream carries the slot and the room changes in order
+    pipeline = [{'$match': {'operationType': {'$in': WATCHED_OPERATIONS},
+                            'ns.coll': {'$in': [collection_name, *ROOM_COLLECTIONS]}}}]
+    resume_token = None
+
+    try:
+        while True:
+            try:
+                database = get_client(uri)[db_name]
+                collection = database[collection_name]
+
+                def load():
+                    model.room_index = RoomIndex.from_database(database)
+                    model.load(list(collection.find({"status": "booked"})))
+
+                def refresh():
+                    if model.rooms_changed:
+                        print(f"[{datetime.now():%H:%M:%S}] تغيرت بيانات الغرف، جارٍ إعادة التحميل...")
+                        load()
+                    watcher.refresh()
+
+                # Open the stream before the initial fetch so no change in between is lost
+                with database.watch(pipeline, full_document='updateLookup',
+                                    max_await_time_ms=500, resume_after=resume_token) as stream:
+                    if resume_token is None:
+                        print("جارٍ جلب الحجوزات المؤكدة...")
+                        load()
+                        print(f"تم تحميل {len(model.rows)} حجز في الفترة المحددة.")
+                        watcher.refresh()
+                        print("في انتظار التغييرات... (Ctrl+C للإيقاف)")
+                    run_watch_loop(stream, model, refresh, debounce_seconds)
+                    resume_token = stream.resume_token
+            except OperationFailure as exc:
+                print(f"تعذر الاشتراك في تغييرات قاعدة البيانات (يتطلب replica set): {exc}")
+                return
+            except PyMongoError as exc:
+                print(f"انقطع الاتصال بقاعدة البيانات، جارٍ إعادة المحاولة: {exc}")
+                time.sleep(5)
+    except KeyboardInterrupt:
+        print("\nتم إيقاف وضع المتابعة.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keeps the A3 landscape booking report up to date from MongoDB changes.")
+    parser.add_argument('--start', required=True, help="start date (DD.MM.YYYY)")
+    parser.add_argument('--end', required=True, help="end date (DD.MM.YYYY)")
+    parser.add_argument('--output', default="Booking_Report.pdf", help="PDF file to keep updated")
+    parser.add_argument('--debounce', type=float, default=2.0, help="seconds of quiet before re-rendering")
+    args = parser.parse_args(argv)
+
+    try:
+        start_date = datetime.strptime(args.start, "%d.%m.%Y").date()
+        end_date = datetime.strptime(args.end, "%d.%m.%Y").date()
+    except ValueError:
+        print("تنسيق التاريخ غير صحيح. برجاء إدخال التاريخ بصيغة DD.MM.YYYY")
+        sys.exit(1)
+
+    if start_date > end_date:
+        print("تاريخ البداية يجب أن يكون قبل أو يساوي تاريخ النهاية.")
+        sys.exit(1)
+
+    report = load_report_script()
+    mongo_uri, db_name, collection_name = report.get_mongo_settings()
+    watch_report(mongo_uri, db_name, collection_name, start_date, end_date, args.output, args.debounce)
+
+
+if __name__ == "__main__":
+    main()
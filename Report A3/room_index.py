@@ -0,0 +1,124 @@
+"""
+Room and room-group lookups for the report scripts.
+
+Slots only store a roomId; the names and the room groups (for example
+"المنارات") live in the rooms and roomgroups collections. RoomIndex loads
+both once and answers every lookup from dictionaries, so the pipeline maps
+whole columns instead of comparing room names row by row.
+"""
+import json
+import os
+
+BACKUP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Backup Data')
+ROOMS_COLLECTION = 'rooms'
+ROOM_GROUPS_COLLECTION = 'roomgroups'
+
+
+def _object_id(value):
+    """Returns the hex string of an ObjectId, an extended-JSON {'$oid': ...} or a plain string."""
+    if isinstance(value, dict):
+        return value.get('$oid', '')
+    return str(value)
+
+
+class RoomIndex:
+    """
+    id→name, name→id and id→groups lookups built from the room and room
+    group documents. Disabled groups are ignored. `names` holds the enabled
+    rooms only (the rooms that can be booked); `all_names` also has the
+    disabled ones, whose past slots are still named in the reports.
+    """
+
+    def __init__(self, rooms, room_groups=()):
+        self.all_names = {_object_id(room['_id']): str(room.get('name', '')).strip() for room in rooms}
+        self.names = {_object_id(room['_id']): self.all_names[_object_id(room['_id'])]
+                      for room in rooms if room.get('isEnabled', True) is not False}
+        self.ids_by_name = {name: room_id for room_id, name in self.all_names.items()}
+        self.groups = {}
+        for group in room_groups:
+            if group.get('isEnabled', True) is False:
+                continue
+            self.groups[str(group['name']).strip()] = [_object_id(room_id) for room_id in group.get('rooms', [])]
+        self.groups_of = {}
+        for group_name, room_ids in sorted(self.groups.items()):
+            for room_id in room_ids:
+                self.groups_of.setdefault(room_id, []).append(group_name)
+
+    @classmethod
+    def from_backup(cls, directory=BACKUP_DIR):
+        """Loads roombooking.rooms.json and roombooking.roomgroups.json from a backup folder."""
+        def read(collection):
+            path = os.path.join(directory, f'roombooking.{collection}.json')
+            if not os.path.exists(path):
+                return []
+            with open(path, encoding='utf-8') as handle:
+                return json.load(handle)
+
+        return cls(read(ROOMS_COLLECTION), read(ROOM_GROUPS_COLLECTION))
+
+    @classmethod
+    def from_database(cls, database):
+        """Loads the index from a pymongo Database."""
+        return cls(list(database[ROOMS_COLLECTION].find({}, {'name': 1, 'isEnabled': 1})),
+                   list(database[ROOM_GROUPS_COLLECTION].find({}, {'name': 1, 'rooms': 1, 'isEnabled': 1})))
+
+    @classmethod
+    def from_mongo(cls, uri, db_name):
+        from mongo_client import get_client
+
+        return cls.from_database(get_client(uri)[db_name])
+
+    def memberships(self):
+        """DataFrame with one (roomId, group) row per room and group it belongs to."""
+        import pandas as pd
+
+        pairs = [(room_id, group) for room_id, groups in self.groups_of.items() for group in groups]
+        return pd.DataFrame(pairs, columns=['roomId', 'group'])
+
+    def room_ids_column(self, df):
+        """The roomId of every row as a hex string, falling back to the room name for legacy rows."""
+        by_name = df['roomName'].map(self.ids_by_name) if 'roomName' in df.columns else None
+        if 'roomId' not in df.columns:
+            return by_name
+        room_ids = df['roomId'].map(_object_id, na_action='ignore')
+        return room_ids if by_name is None else room_ids.fillna(by_name)
+
+    def room_ids_matching(self, keywords):
+        """
+        Ids of the rooms whose name contains one of the keywords (case
+        insensitive), plus every room of a group whose name does. Resolving
+        names once here lets the reports filter slots by id instead of
+        scanning every row's room name.
+        """
+        keywords = [keyword.casefold() for keyword in keywords]
+
+        def matches(name):
+            name = name.casefold()
+            return any(keyword in name for keyword in keywords)
+
+        room_ids = {room_id for room_id, name in self.all_names.items() if matches(name)}
+        for group_name, group_room_ids in self.groups.items():
+            if matches(group_name):
+                room_ids.update(group_room_ids)
+        return room_ids
+
+    def filter_rooms(self, df, room_ids):
+        """The rows of df whose room is one of room_ids."""
+        return df[self.room_ids_column(df).isin(room_ids)]
+
+    def without_disabled_rooms(self, df):
+        """The rows of df that are not in a disabled room."""
+        disabled = self.all_names.keys() - self.names.keys()
+        room_ids = self.room_ids_column(df) if disabled else None
+        return df if room_ids is None else df[~room_ids.isin(disabled)]
+
+    def add_room_names(self, df):
+        """Fills roomName from roomId where the slot carries no name of its own."""
+        if 'roomId' not in df.columns:
+            return df
+        names = df['roomId'].map(_object_id).map(self.all_names)
+        if 'roomName' in df.columns:
+            df['roomName'] = df['roomName'].where(df['roomName'].notna(), names)
+        else:
+            df['roomName'] = names
+        return df
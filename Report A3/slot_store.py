@@ -0,0 +1,379 @@
+"""
+Booked slots of several years as memory-mapped NumPy arrays.
+
+Fetching years of slots from MongoDB (or parsing a backup) and normalizing
+the nested names takes far longer than any analysis run on them afterwards.
+`build` does it once and writes every booked slot as one row of fixed-width
+columns, one .npy file per column:
+
+    room, service, provider   int32 codes into the name lists of store.json
+    day                       int32 Cairo-local day ordinal
+    start, end                int16 minutes since midnight
+    weekly                    int8, 1 for slots booked with the weekly option
+
+sorted by room, service, provider, day and start. SlotStore.open maps the
+files with np.load(mmap_mode='r'): opening a store reads the .npy headers
+and the name lists only, and the pages of a column are read when a stage
+first touches them.
+
+The stages run on the arrays. merged() joins contiguous slots with one
+vectorized pass (the rows are already in merge order), recurrence() groups
+them by room, service, provider, weekday and time, and utilization() feeds
+the intervals to IntervalIndex and Utilization. Names are turned back into
+strings only as categoricals of the (much smaller) results.
+
+Usage:
+    python slot_store.py build DIR [--input FILE] [--stats]
+    python slot_store.py utilization DIR [--start DD.MM.YYYY] [--end DD.MM.YYYY] [--json FILE] [--stats]
+    python slot_store.py recurrence DIR [--start DD.MM.YYYY] [--end DD.MM.YYYY] [--json FILE] [--stats]
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+from interval_index import IntervalIndex, minutes_to_time, time_to_minutes
+from local_dates import ordinal_dates, ordinal_weekdays
+from report_stats import NO_STATS
+from utilization import Utilization
+from weekly_series import weekly_gaps, weekly_recurrence
+
+FORMAT_VERSION = 1
+META_FILE = 'store.json'
+
+# Column -> dtype of the .npy file
+COLUMNS = {
+    'room': 'int32',
+    'service': 'int32',
+    'provider': 'int32',
+    'day': 'int32',
+    'start': 'int16',
+    'end': 'int16',
+    'weekly': 'int8',
+}
+
+# Coded columns -> the slots column their names come from
+NAME_COLUMNS = {'room': 'roomName', 'service': 'serviceName', 'provider': 'providerName'}
+
+
+class SlotStore:
+    """
+    Slots as parallel arrays (`columns`, keyed like COLUMNS) and the name
+    list of every coded column (`names`). Opened stores hold read-only
+    np.memmap arrays; merged() returns a store held in memory.
+    """
+
+    def __init__(self, columns, names, directory=None):
+        self.columns = columns
+        self.names = names
+        self.directory = directory
+
+    def __len__(self):
+        return len(self.columns['day'])
+
+    @classmethod
+    def from_slots(cls, booked_df, rooms=()):
+        """
+        Store arrays of booked slots as returned by booked_slots() of the
+        report script. Slots whose start or end time does not parse are
+        left out. The room names also list `rooms`, so utilization() counts
+        the rooms that have no bookings.
+        """
+        import numpy as np
+        import pandas as pd
+
+        starts = time_to_minutes(booked_df['startTime'])
+        ends = time_to_minutes(booked_df['endTime'])
+        valid = (starts.notna() & ends.notna()).to_numpy()
+        slots = booked_df[valid]
+
+        columns = {}
+        names = {}
+        for key, column in NAME_COLUMNS.items():
+            values = slots[column].astype(str)
+            categories = sorted(set(values.unique()).union(map(str, rooms) if key == 'room' else ()))
+            columns[key] = pd.Categorical(values, categories=categories).codes
+            names[key] = categories
+        columns['day'] = slots['day'].to_numpy()
+        columns['start'] = starts[valid].to_numpy()
+        columns['end'] = ends[valid].to_numpy()
+        if 'type' in slots.columns:
+            columns['weekly'] = (slots['type'] == 'weekly').to_numpy()
+        else:
+            columns['weekly'] = np.zeros(len(slots), dtype=bool)
+
+        order = np.lexsort(tuple(columns[key] for key in ('start', 'day', 'provider', 'service', 'room')))
+        columns = {key: np.ascontiguousarray(columns[key][order], dtype=dtype) for key, dtype in COLUMNS.items()}
+        return cls(columns, names)
+
+    @classmethod
+    def write(cls, directory, booked_df, stats=None, rooms=()):
+        """Writes the slots to directory (created if needed) and returns the store opened from it."""
+        import numpy as np
+
+        stats = stats or NO_STATS
+        with stats.stage('store-write', rows_in=len(booked_df)) as stage:
+            store = cls.from_slots(booked_df, rooms=rooms)
+            os.makedirs(directory, exist_ok=True)
+            for key in COLUMNS:
+                np.save(os.path.join(directory, f"{key}.npy"), store.columns[key])
+            # Written last: a directory without it is an unfinished store
+            meta = {'version': FORMAT_VERSION, 'rows': len(store), 'names': store.names}
+            with open(os.path.join(directory, META_FILE), 'w', encoding='utf-8') as handle:
+                json.dump(meta, handle, ensure_ascii=False)
+            stage['rows_out'] = len(store)
+            stage['dropped'] = len(booked_df) - len(store)
+        return cls.open(directory)
+
+    @classmethod
+    def open(cls, directory, stats=None):
+        """Memory-maps the store in directory; ValueError when it is missing, unfinished or of another version."""
+        import numpy as np
+
+        stats = stats or NO_STATS
+        with stats.stage('store-open') as stage:
+            try:
+                with open(os.path.join(directory, META_FILE), encoding='utf-8') as handle:
+                    meta = json.load(handle)
+            except FileNotFoundError:
+                raise ValueError(f"no slot store in {directory}") from None
+            if meta.get('version') != FORMAT_VERSION:
+                raise ValueError(f"slot store version {meta.get('version')} in {directory}, expected {FORMAT_VERSION}")
+            columns = {key: np.load(os.path.join(directory, f"{key}.npy"), mmap_mode='r') for key in COLUMNS}
+            if any(len(column) != meta['rows'] for column in columns.values()):
+                raise ValueError(f"slot store in {directory} is inconsistent; build it again")
+            stage['rows_out'] = meta['rows']
+        return cls(columns, meta['names'], directory)
+
+    def between(self, first_day=None, last_day=None):
+        """The slots from day ordinal first_day to last_day (both inclusive; open-ended when None)."""
+        import numpy as np
+
+        days = self.columns['day']
+        keep = np.ones(len(days), dtype=bool)
+        if first_day is not None:
+            keep &= days >= first_day
+        if last_day is not None:
+            keep &= days <= last_day
+        if keep.all():
+            return self
+        return SlotStore({key: column[keep] for key, column in self.columns.items()}, self.names, self.directory)
+
+    def names_of(self, key, codes=None):
+        """The names of a coded column as a Categorical (of the given codes, or of every row)."""
+        import numpy as np
+        import pandas as pd
+
+        codes = self.columns[key] if codes is None else codes
+        return pd.Categorical.from_codes(np.asarray(codes), categories=self.names[key])
+
+    def merged(self, stats=None):
+        """
+        Contiguous slots of the same room, service, provider and day joined,
+        like merge_booked_slots: a slot continues the previous one when it
+        starts at the minute the previous one ends. A merged slot is weekly
+        when all of its slots are.
+        """
+        import numpy as np
+
+        stats = stats or NO_STATS
+        with stats.stage('merge', rows_in=len(self)) as stage:
+            count = len(self)
+            if not count:
+                return self
+            columns = self.columns
+            breaks = np.ones(count, dtype=bool)
+            breaks[1:] = columns['start'][1:] != columns['end'][:-1]
+            for key in ('room', 'service', 'provider', 'day'):
+                breaks[1:] |= columns[key][1:] != columns[key][:-1]
+            heads = np.flatnonzero(breaks)
+            tails = np.r_[heads[1:], count] - 1
+
+            merged = {key: columns[key][heads] for key in ('room', 'service', 'provider', 'day', 'start')}
+            merged['end'] = columns['end'][tails]
+            merged['weekly'] = np.minimum.reduceat(columns['weekly'], heads)
+            stage['rows_out'] = len(heads)
+        return SlotStore(merged, self.names)
+
+    def recurrence(self, stats=None):
+        """
+        The weekly recurring bookings of the (merged) slots, decided like the
+        report's classify stage: a DataFrame with the room, service and
+        provider (categoricals), weekday, start and end minute, first and
+        last day ordinal, booking count and number of skipped weeks.
+        """
+        import numpy as np
+        import pandas as pd
+
+        stats = stats or NO_STATS
+        with stats.stage('recurrence', rows_in=len(self)) as stage:
+            keys = pd.DataFrame({key: self.columns[key] for key in ('room', 'service', 'provider', 'start', 'end')})
+            days = np.asarray(self.columns['day'])
+            keys['weekday'] = ordinal_weekdays(days)
+            codes = keys.groupby(['room', 'service', 'provider', 'weekday', 'start', 'end'], sort=True).ngroup().to_numpy()
+            code_count = int(codes.max()) + 1 if len(codes) else 0
+            order, occurrences, is_recurring = weekly_recurrence(codes, days, code_count)
+
+            recurring_rows = order[is_recurring[codes[order]]]
+            recurring_codes = codes[recurring_rows]
+            new_code = np.ones(len(recurring_codes), dtype=bool)
+            new_code[1:] = recurring_codes[1:] != recurring_codes[:-1]
+            heads = recurring_rows[new_code]
+            first = np.full(code_count, days.max() if len(days) else 0)
+            last = np.zeros(code_count, dtype=np.int64)
+            np.minimum.at(first, recurring_codes, days[recurring_rows])
+            np.maximum.at(last, recurring_codes, days[recurring_rows])
+            missing_codes, _ = weekly_gaps(recurring_codes, days[recurring_rows])
+            missing = np.bincount(missing_codes, minlength=code_count)
+
+            head_codes = codes[heads]
+            recurring = pd.DataFrame({
+                'room': self.names_of('room', self.columns['room'][heads]),
+                'service': self.names_of('service', self.columns['service'][heads]),
+                'provider': self.names_of('provider', self.columns['provider'][heads]),
+                'weekday': keys['weekday'].to_numpy()[heads].astype(np.int8),
+                'start': np.asarray(self.columns['start'])[heads],
+                'end': np.asarray(self.columns['end'])[heads],
+                'first_day': first[head_codes].astype(np.int32),
+                'last_day': last[head_codes].astype(np.int32),
+                'booking_count': occurrences[head_codes].astype(np.int32),
+                'missing_weeks': missing[head_codes].astype(np.int32),
+            })
+            stage['rows_out'] = len(recurring)
+        return recurring
+
+    def intervals(self):
+        """The room, date, start/end minute, service and provider columns IntervalIndex.from_intervals takes."""
+        import pandas as pd
+
+        return pd.DataFrame({
+            'room': self.names_of('room'),
+            'date': ordinal_dates(self.columns['day']),
+            'start': self.columns['start'],
+            'end': self.columns['end'],
+            'service': self.names_of('service'),
+            'provider': self.names_of('provider'),
+        })
+
+    def utilization(self, start_date=None, end_date=None, stats=None):
+        """
+        Utilization of the slots between start_date and end_date (both
+        inclusive; the first and last booked dates by default). Merging
+        does not change the booked minutes, so this runs on the stored slots
+        as well as on merged().
+        """
+        stats = stats or NO_STATS
+        slots = self.between(start_date.toordinal() if start_date else None,
+                             end_date.toordinal() if end_date else None)
+        with stats.stage('utilization', rows_in=len(slots)) as stage:
+            occupied = IntervalIndex.from_intervals(slots.intervals()).occupied()
+            utilization = Utilization.from_occupied(occupied, start_date, end_date, rooms=self.names['room'])
+            stage['rows_out'] = len(utilization.rooms)
+        return utilization
+
+
+def _parse_date(text):
+    return datetime.strptime(text, "%d.%m.%Y").date()
+
+
+def _recurrence_records(recurring):
+    """JSON-ready recurring bookings with dates and HH:MM times."""
+    from datetime import date
+
+    return [{
+        'room': room,
+        'service': service,
+        'provider': provider,
+        'weekday': int(weekday),
+        'start': minutes_to_time(start),
+        'end': minutes_to_time(end),
+        'first_date': date.fromordinal(int(first)).isoformat(),
+        'last_date': date.fromordinal(int(last)).isoformat(),
+        'booking_count': int(count),
+        'missing_weeks': int(missing),
+    } for room, service, provider, weekday, start, end, first, last, count, missing
+        in recurring.itertuples(index=False, name=None)]
+
+
+def build(directory, input_path=None, stats=None):
+    """Loads every booked slot (MongoDB, or the backup file input_path) and writes the store to directory."""
+    import contextlib
+    import io
+
+    from report_loader import load_report_script
+    from room_index import RoomIndex
+
+    report = load_report_script()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if input_path:
+            room_index = RoomIndex.from_backup()
+            slots = report.load_slots_from_file(input_path, None, None, stats=stats)
+        else:
+            mongo_uri, db_name, collection_name = report.get_mongo_settings()
+            room_index = RoomIndex.from_mongo(mongo_uri, db_name)
+            slots = report.fetch_slots_from_mongo(mongo_uri, db_name, collection_name, None, None, stats=stats)
+        booked = report.booked_slots(slots, stats=stats, room_index=room_index)
+    return SlotStore.write(directory, booked, stats=stats, rooms=room_index.names.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory-mapped store of all booked slots for multi-year analytics.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help="load every booked slot and write the store")
+    build_parser.add_argument('directory', help="store directory (created if needed)")
+    build_parser.add_argument('--input', metavar='FILE', help="read the slots from a mongoexport/backup JSON file instead of MongoDB")
+    command_parsers = [build_parser]
+    for name, help_text in (('utilization', "booked minutes per room, weekday and hour"),
+                            ('recurrence', "weekly recurring bookings with their skipped weeks")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('directory', help="store directory written by build")
+        command.add_argument('--start', help="first date DD.MM.YYYY (the first booked date by default)")
+        command.add_argument('--end', help="last date DD.MM.YYYY (the last booked date by default)")
+        command.add_argument('--json', metavar='FILE', help="write the result to FILE as JSON")
+        command_parsers.append(command)
+    # After the command, like its other options
+    for command in command_parsers:
+        command.add_argument('--stats', action='store_true', help="print wall/CPU time, rows and memory per stage")
+    args = parser.parse_args(argv)
+
+    from report_stats import PipelineStats
+
+    stats = PipelineStats() if args.stats else None
+
+    if args.command == 'build':
+        store = build(args.directory, args.input, stats=stats)
+        print(f"تم حفظ {len(store)} فترة محجوزة في '{args.directory}' "
+              f"({len(store.names['room'])} غرفة، {len(store.names['service'])} خدمة، {len(store.names['provider'])} خادم).")
+    else:
+        try:
+            start_date = _parse_date(args.start) if args.start else None
+            end_date = _parse_date(args.end) if args.end else None
+            store = SlotStore.open(args.directory, stats=stats)
+        except ValueError as exc:
+            print(f"مدخلات غير صحيحة: {exc}")
+            return 1
+
+        if args.command == 'utilization':
+            utilization = store.utilization(start_date, end_date, stats=stats)
+            result = utilization.as_dict()
+            print(f"نسبة الإشغال لـ {len(utilization.rooms)} غرفة "
+                  f"({utilization.start_date} - {utilization.end_date}).")
+        else:
+            slots = store.between(start_date.toordinal() if start_date else None,
+                                  end_date.toordinal() if end_date else None)
+            recurring = slots.merged(stats=stats).recurrence(stats=stats)
+            result = _recurrence_records(recurring)
+            print(f"{len(recurring)} حجز متكرر، منها {int((recurring['missing_weeks'] > 0).sum())} بأسابيع متخطاة.")
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as handle:
+                json.dump(result, handle, ensure_ascii=False, indent=2)
+            print(f"تم الحفظ في '{args.json}'")
+
+    if stats is not None:
+        print(stats.summary_table())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
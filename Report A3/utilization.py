@@ -0,0 +1,155 @@
+"""
+Room utilization computed from the merged slots.
+
+Every booked interval (overlaps joined, see IntervalIndex.occupied) is split
+into the hour buckets it covers, and the minutes are summed per
+room x weekday x hour with a single np.bincount over the flattened cell
+codes. Occupancy divides those minutes by the capacity of the cell: 60
+minutes times the number of such weekdays in the reported period.
+"""
+from interval_index import UNKNOWN_ROOM, IntervalIndex
+
+# Opening hours used for the heatmap columns and the free-capacity windows
+OPENING_HOUR = 9
+CLOSING_HOUR = 22
+
+# Saturday first, like the church week
+WEEKDAYS = ['Saturday', 'Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+
+
+def _day_order(dates):
+    """Position of each date's weekday in WEEKDAYS."""
+    return (dates.dt.weekday.to_numpy() + 2) % 7
+
+
+class Utilization:
+    """
+    Booked minutes per room, weekday and hour (`booked_minutes`, shaped
+    rooms x 7 x 24) and the number of each weekday in the period
+    (`day_counts`), from which the occupancy views are derived.
+    """
+
+    def __init__(self, rooms, booked_minutes, day_counts, start_date, end_date):
+        self.rooms = rooms
+        self.booked_minutes = booked_minutes
+        self.day_counts = day_counts
+        self.start_date = start_date
+        self.end_date = end_date
+        self.hours = list(range(OPENING_HOUR, CLOSING_HOUR))
+
+    @classmethod
+    def from_merged_slots(cls, merged_df, start_date=None, end_date=None, rooms=()):
+        """
+        Computes the utilization of the merged slots between start_date and
+        end_date (both inclusive; the first and last booked dates by default).
+        `rooms` are all rooms to measure; pass the full room list so rooms
+        without bookings count as 0% instead of being left out.
+        """
+        return cls.from_occupied(IntervalIndex(merged_df).occupied(), start_date, end_date, rooms=rooms)
+
+    @classmethod
+    def from_occupied(cls, occupied, start_date=None, end_date=None, rooms=()):
+        """from_merged_slots over the room, date, start and end of IntervalIndex.occupied()."""
+        import numpy as np
+        import pandas as pd
+
+        if start_date is None:
+            start_date = occupied['date'].min().date() if len(occupied) else None
+        if end_date is None:
+            end_date = occupied['date'].max().date() if len(occupied) else None
+
+        rooms = sorted((set(rooms) - {UNKNOWN_ROOM}).union(occupied['room'].unique()))
+        if not rooms or start_date is None:
+            return cls(rooms, np.zeros((len(rooms), 7, 24), dtype=np.int64), np.zeros(7, dtype=np.int64), start_date, end_date)
+        room_codes = pd.Categorical(occupied['room'], categories=rooms).codes.astype(np.int64)
+        cells = (room_codes * 7 + _day_order(occupied['date'])) * 24
+
+        # Minutes of every interval falling into each hour bucket: n x 24
+        bucket_starts = np.arange(24) * 60
+        starts = occupied['start'].to_numpy()[:, None]
+        ends = occupied['end'].to_numpy()[:, None]
+        minutes = np.clip(np.minimum(ends, bucket_starts + 60) - np.maximum(starts, bucket_starts), 0, None)
+
+        booked = np.bincount((cells[:, None] + np.arange(24)).ravel(), weights=minutes.ravel(),
+                             minlength=len(rooms) * 7 * 24)
+        days = pd.Series(pd.date_range(start_date, end_date, freq='D'))
+        day_counts = np.bincount(_day_order(days), minlength=7)
+        return cls(rooms, booked.astype(np.int64).reshape(len(rooms), 7, 24), day_counts, start_date, end_date)
+
+    def occupancy(self):
+        """Share of the capacity booked, rooms x 7 x 24, between 0 and 1."""
+        import numpy as np
+
+        capacity = (self.day_counts * 60)[None, :, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(capacity > 0, self.booked_minutes / np.maximum(capacity, 1), 0.0)
+
+    def weekday_hour_occupancy(self):
+        """Occupancy of all rooms together per weekday and opening hour, 7 x hours."""
+        if not self.rooms:
+            return self.occupancy().sum(axis=0)[:, self.hours]
+        return self.occupancy().mean(axis=0)[:, self.hours]
+
+    def room_hour_occupancy(self):
+        """Occupancy of every room per opening hour over the whole week, rooms x hours."""
+        import numpy as np
+
+        capacity = self.day_counts.sum() * 60
+        if capacity == 0:
+            return np.zeros((len(self.rooms), len(self.hours)))
+        return self.booked_minutes.sum(axis=1)[:, self.hours] / capacity
+
+    def peak_hours(self, limit=10):
+        """The busiest weekday/hour cells of the building as dicts, busiest first."""
+        import numpy as np
+
+        occupancy = self.weekday_hour_occupancy()
+        busy_rooms = (self.booked_minutes[:, :, self.hours] > 0).sum(axis=0)
+        order = np.argsort(-occupancy, axis=None, kind='stable')[:limit]
+        peaks = []
+        for day, hour_position in zip(*np.unravel_index(order, occupancy.shape)):
+            if occupancy[day, hour_position] <= 0:
+                break
+            peaks.append({
+                'day': WEEKDAYS[day],
+                'hour': self.hours[hour_position],
+                'occupancy': round(float(occupancy[day, hour_position]), 4),
+                'rooms_used': int(busy_rooms[day, hour_position]),
+            })
+        return peaks
+
+    def free_windows(self):
+        """
+        Opening-hour ranges in which a room was never booked on that weekday
+        during the period, as dicts of room, day, start and end hour.
+        """
+        import numpy as np
+
+        free = self.booked_minutes[:, :, self.hours] == 0
+        padded = np.pad(free, ((0, 0), (0, 0), (1, 1)), constant_values=False).astype(np.int8)
+        edges = np.diff(padded, axis=2)
+        room_idx, day_idx, start_idx = np.nonzero(edges == 1)
+        _, _, end_idx = np.nonzero(edges == -1)
+        return [{
+            'room': self.rooms[room],
+            'day': WEEKDAYS[day],
+            'start_hour': self.hours[start],
+            'end_hour': self.hours[end - 1] + 1,
+        } for room, day, start, end in zip(room_idx.tolist(), day_idx.tolist(), start_idx.tolist(), end_idx.tolist())]
+
+    def as_dict(self):
+        """JSON-ready summary: per-room booked minutes and the derived views."""
+        return {
+            'start_date': str(self.start_date),
+            'end_date': str(self.end_date),
+            'weekdays': WEEKDAYS,
+            'hours': self.hours,
+            'day_counts': self.day_counts.tolist(),
+            'rooms': {
+                room: self.booked_minutes[position][:, self.hours].tolist()
+                for position, room in enumerate(self.rooms)
+            },
+            'weekday_hour_occupancy': self.weekday_hour_occupancy().round(4).tolist(),
+            'peak_hours': self.peak_hours(),
+            'free_windows': self.free_windows(),
+        }
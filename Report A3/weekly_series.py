@@ -0,0 +1,226 @@
+"""
+Weekly slot series, collapsed before the contiguous-slot merge.
+
+Slots created from the booking form's weekly option are stored with
+type 'weekly' (server/models/Slot.js). The documents carry no series id,
+so a series here is the weekly slots of one room, service and provider
+(group_key), weekday and start/end time, and its days are the Cairo-local
+day ordinals it was booked on.
+
+The row-by-row merge joins a slot with the next one of the same group_key
+and day when it starts where the previous one ends. When several series
+of a group_key have exactly the same days and nothing else of that
+group_key is booked on those days, every one of those days holds the same
+slots, so the merge can run once over the series instead of once per day.
+Each chain of such series becomes its head series' rows with the chain's
+end time, tagged with a series number; everything else (single slots and
+series that share a day with other bookings) is left to the row-by-row
+merge, which keeps the result identical.
+
+The recurrence of a series is described by its exceptions rather than by
+a yes/no verdict: weekly_gaps lists, for many series at once, the weeks
+between the first and last booking that were not booked, and
+moved_sessions pairs such a missing week with a booking of the same room,
+service, provider and time a few days away (a session moved to another
+day), so a report can say "every Thursday except X, plus Y" in one row.
+"""
+from local_dates import ordinal_weekdays
+
+# Series number of the merged rows that did not come from a collapsed series
+NO_SERIES = -1
+
+
+def collapse_weekly_series(booked_df):
+    """
+    Splits booked slots, sorted by group_key, day and startTime, into
+    (merged series rows, rows left to merge, series). The merged rows are
+    in the same order and carry a 'series' column; `series` has one row per
+    collapsed chain with its weekday, times, first and last day, booking
+    count and the weeks missing between them (see series_exceptions).
+    """
+    import numpy as np
+    import pandas as pd
+
+    if 'type' not in booked_df.columns:
+        return booked_df.iloc[:0], booked_df, pd.DataFrame()
+    weekly = (booked_df['type'] == 'weekly').to_numpy()
+    if not weekly.any():
+        return booked_df.iloc[:0], booked_df, pd.DataFrame()
+
+    slots = booked_df.loc[weekly, ['group_key', 'day', 'startTime', 'endTime']]
+    slots['weekday'] = ordinal_weekdays(slots['day'])
+    series_codes = slots.groupby(['group_key', 'weekday', 'startTime', 'endTime'], sort=False).ngroup().to_numpy()
+    series_days = slots.groupby(series_codes, sort=True)['day'].agg(tuple)
+    series = slots.groupby(series_codes, sort=True)[['group_key', 'startTime', 'endTime']].first()
+    series['days'] = series_days
+
+    # Series of one group_key booked on exactly the same days, and how many there are
+    cluster_codes = series.groupby(['group_key', 'days'], sort=False).ngroup().to_numpy()
+    cluster_sizes = np.bincount(cluster_codes)
+
+    # A cluster collapses when every one of its days holds only its own slots
+    bookings_per_day = booked_df.groupby(['group_key', 'day'], sort=False)['day'].transform('size').to_numpy()
+    # (a series booked twice on one day counts twice there, so it never collapses)
+    row_clusters = cluster_codes[series_codes]
+    row_alone = bookings_per_day[weekly] == cluster_sizes[row_clusters]
+    clean = np.bincount(row_clusters[~row_alone], minlength=len(cluster_sizes)) == 0
+    # Slots starting at the same time are ordered arbitrarily by the merge's sort; leave those to it
+    series['cluster'] = cluster_codes
+    clean[series.loc[series.duplicated(['cluster', 'startTime']), 'cluster'].to_numpy()] = False
+
+    # Chain the series of every clean cluster like the row-by-row merge chains slots: a series
+    # continues the chain when it starts where the previous series of its cluster ends
+    series = series[clean[cluster_codes]].sort_values(['cluster', 'startTime'], kind='stable')
+    continues = ((series['cluster'] == series['cluster'].shift())
+                 & (series['startTime'] == series['endTime'].shift())).to_numpy()
+    chain_numbers = np.cumsum(~continues) - 1
+    chains = series[~continues]
+    chain_ends = series['endTime'].groupby(chain_numbers).last().to_numpy()
+
+    collapsed_rows = np.zeros(len(booked_df), dtype=bool)
+    collapsed_rows[weekly] = np.isin(series_codes, series.index)
+    head_rows = np.zeros(len(booked_df), dtype=bool)
+    head_rows[weekly] = np.isin(series_codes, chains.index)
+
+    # Every collapsed day is one row of the chain's head series
+    head_chains = pd.Series(np.arange(len(chains)), index=chains.index).loc[series_codes[head_rows[weekly]]].to_numpy()
+    head_days = slots['day'].to_numpy(dtype=np.int64)[head_rows[weekly]]
+    heads = booked_df[head_rows].copy()
+    heads['endTime'] = chain_ends[head_chains]
+    heads['series'] = head_chains.astype(np.int32)
+
+    missing_chains, missing_days = weekly_gaps(head_chains, head_days)
+    exceptions = pd.Series([()] * len(chains), dtype=object)
+    exceptions.update(pd.Series(missing_days.tolist()).groupby(missing_chains).agg(tuple))
+    span = pd.Series(head_days).groupby(head_chains).agg(['min', 'max', 'size'])
+    collapsed = pd.DataFrame({
+        'group_key': chains['group_key'].to_numpy(),
+        'weekday': ordinal_weekdays(span['min'].to_numpy()),
+        'startTime': chains['startTime'].to_numpy(),
+        'endTime': chain_ends,
+        'first_day': span['min'].to_numpy(),
+        'last_day': span['max'].to_numpy(),
+        'booking_count': span['size'].to_numpy(),
+        'exceptions': exceptions.to_numpy(),
+    })
+    return heads, booked_df[~collapsed_rows], collapsed
+
+
+def weekly_recurrence(codes, days, code_count=None):
+    """
+    Decides which codes (room, service, provider, weekday and time) recur
+    weekly from the day ordinals of their bookings. Returns the (code, day)
+    sort order of the bookings, the number of bookings per code and the
+    per-code verdict.
+    """
+    import numpy as np
+
+    codes = np.asarray(codes, dtype=np.int64)
+    days = np.asarray(days)
+    if code_count is None:
+        code_count = int(codes.max()) + 1 if len(codes) else 0
+
+    # Days between consecutive bookings of the same code, in date order
+    order = np.lexsort((days, codes))
+    sorted_codes = codes[order]
+    sorted_days = days[order].astype(np.int64)
+    same_code = np.zeros(len(codes), dtype=bool)
+    same_code[1:] = sorted_codes[1:] == sorted_codes[:-1]
+    gaps = np.diff(sorted_days, prepend=sorted_days[:1])
+    weekly = same_code & (gaps > 0) & (gaps % 7 == 0)
+
+    occurrences = np.bincount(codes, minlength=code_count)
+    weekly_intervals = np.bincount(sorted_codes[weekly], minlength=code_count)
+    intervals = occurrences - 1
+    # A booking is weekly recurring if, with at least 2 occurrences on the same weekday:
+    # 1. at least 50% of the intervals are multiples of 7 days
+    # 2. OR there are 3+ occurrences and at least one weekly interval
+    # 3. OR there are 2 occurrences exactly a week (or weeks) apart
+    is_recurring = (occurrences >= 2) & (
+        (2 * weekly_intervals >= intervals)
+        | ((occurrences >= 3) & (weekly_intervals >= 1))
+        | ((occurrences == 2) & (weekly_intervals == 1))
+    )
+    return order, occurrences, is_recurring
+
+
+def weekly_gaps(codes, days):
+    """
+    The weeks every series skipped: given the (series code, day ordinal)
+    of its bookings, returns the (codes, days) arrays of the days 7, 14, ...
+    after each series' first day, up to its last, that it has no booking on.
+    """
+    import numpy as np
+
+    codes = np.asarray(codes, dtype=np.int64)
+    days = np.asarray(days, dtype=np.int64)
+    if not len(codes):
+        return codes, days
+
+    series_count = int(codes.max()) + 1
+    first = np.full(series_count, days.max())
+    last = np.full(series_count, days.min())
+    np.minimum.at(first, codes, days)
+    np.maximum.at(last, codes, days)
+    weeks = np.where(np.bincount(codes, minlength=series_count) > 0, (last - first) // 7 + 1, 0)
+
+    # Every expected (code, day), then a set difference on one int64 key per pair
+    expected_codes = np.repeat(np.arange(series_count), weeks)
+    week_numbers = np.arange(len(expected_codes)) - np.repeat(np.cumsum(weeks) - weeks, weeks)
+    expected_days = first[expected_codes] + 7 * week_numbers
+    base, span = days.min(), days.max() - days.min() + 1
+    missing = ~np.isin(expected_codes * span + (expected_days - base), codes * span + (days - base))
+    return expected_codes[missing], expected_days[missing]
+
+
+def moved_sessions(missing_keys, missing_days, booking_keys, booking_days, window=6):
+    """
+    Pairs bookings with the missing weeks they stand in for: a booking is a
+    moved session when a missing week with the same key is at most `window`
+    days away. A missing week prefers a booking the key's next missing week
+    cannot reach, then the nearer one, then the earlier day; a booking
+    prefers the earlier missing week. The pairs are the stable matching of
+    those preferences, found in rounds in which every unpaired week proposes
+    to its next choice, so a week does not take the only candidate of the
+    next one when it has another, and the result does not depend on the row
+    order. Returns (booking positions, missing-week positions).
+    """
+    import numpy as np
+    import pandas as pd
+
+    # Missing weeks in (key, day) order; the position is the week's priority
+    missing = pd.DataFrame({'key': missing_keys, 'missing_day': missing_days, 'missing': np.arange(len(missing_keys))})
+    missing = missing.sort_values(['key', 'missing_day'], kind='stable', ignore_index=True)
+    missing['priority'] = np.arange(len(missing))
+    missing['next_day'] = missing.groupby('key')['missing_day'].shift(-1)
+    bookings = pd.DataFrame({'key': booking_keys, 'day': booking_days, 'booking': np.arange(len(booking_keys))})
+
+    # Every week's candidates in its order of preference
+    pairs = missing.merge(bookings, on='key')
+    pairs['distance'] = (pairs['day'] - pairs['missing_day']).abs()
+    pairs = pairs[pairs['distance'].between(1, window)]
+    pairs = pairs.assign(contested=(pairs['day'] - pairs['next_day']).abs().between(1, window))
+    pairs = pairs.sort_values(['priority', 'contested', 'distance', 'day', 'booking'], kind='stable')
+    choices = pairs['booking'].to_numpy(dtype=np.int64)
+    priorities = np.arange(len(missing))
+    next_choice = np.searchsorted(pairs['priority'].to_numpy(), priorities)
+    last_choice = np.searchsorted(pairs['priority'].to_numpy(), priorities, side='right')
+
+    holder = np.full(len(bookings), -1, dtype=np.int64)
+    proposing = priorities[next_choice < last_choice]
+    while len(proposing):
+        proposed = choices[next_choice[proposing]]
+        next_choice[proposing] += 1
+        # Each booking proposed to keeps the earliest of its holder and its proposers
+        held = np.unique(proposed)
+        held = held[holder[held] >= 0]
+        weeks = np.concatenate([proposing, holder[held]])
+        targets = np.concatenate([proposed, held])
+        order = np.lexsort((weeks, targets))
+        _, first = np.unique(targets[order], return_index=True)
+        holder[targets[order][first]] = weeks[order][first]
+        rejected = weeks[~np.isin(weeks, weeks[order][first])]
+        proposing = rejected[next_choice[rejected] < last_choice[rejected]]
+
+    paired = np.flatnonzero(holder >= 0)
+    return paired, missing['missing'].to_numpy(dtype=np.int64)[holder[paired]]
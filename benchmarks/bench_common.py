@@ -0,0 +1,71 @@
+"""
+Shared helpers for the report benchmarks: script locations and a results log
+so runs from different versions can be compared.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+sys.path.insert(0, os.path.join(REPO_ROOT, 'Report A3'))
+
+from report_loader import LANDSCAPE_SCRIPT, MUSIC_ROOM_SCRIPT, REPORT_DIR  # noqa: E402
+
+ENTRY_POINTS = {
+    'a3-landscape': LANDSCAPE_SCRIPT,
+    'music-room-a4': MUSIC_ROOM_SCRIPT,
+}
+
+
+def git_revision():
+    try:
+        output = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def _results_path(suite):
+    return os.path.join(RESULTS_DIR, f'{suite}.jsonl')
+
+
+def previous_results(suite):
+    """Returns the last recorded run of a suite, or None."""
+    path = _results_path(suite)
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            if line.strip():
+                last = json.loads(line)
+    return last
+
+
+def record_results(suite, results):
+    """Appends one run of a suite to benchmarks/results/<suite>.jsonl and returns the entry."""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    entry = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(_results_path(suite), 'a', encoding='utf-8') as handle:
+        handle.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    return entry
+
+
+def format_delta(current, previous):
+    """Formats the relative change against a previous value, e.g. '+12%'."""
+    if not previous:
+        return ''
+    return f'{(current - previous) / previous * 100:+.0f}%'
@@ -0,0 +1,135 @@
+"""
+Scaling benchmark for the report pipelines.
+
+Generates synthetic slot datasets of increasing size and times every stage of
+`process_bookings` + `create_pdf` (A3 landscape) and
+`process_bookings_for_music_room` + `create_pdf` (music room A4). Results are
+appended to benchmarks/results/scaling.jsonl and compared with the previous
+run so regressions between versions are visible.
+
+Usage:
+    python benchmarks/bench_scaling.py [--sizes 1000,10000,100000] [--pdf-max-rows 20000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+from bench_common import (LANDSCAPE_SCRIPT, MUSIC_ROOM_SCRIPT, format_delta, previous_results,
+                          record_results)
+from report_loader import load_report_script
+from report_stats import PipelineStats
+from synthetic_data import generate_slots, synthetic_room_index
+
+DEFAULT_SIZES = '1000,10000,100000'
+
+
+def _run_landscape(frame, room_index, stats, with_pdf):
+    report = load_report_script()
+    recurring, onetime, grouped = report.process_bookings(frame, stats=stats, room_index=room_index)
+    with stats.stage('sort', rows_in=len(recurring) + len(onetime) + len(grouped)):
+        sections = report.sort_report_sections(recurring, onetime, grouped)
+    if with_pdf:
+        report.create_pdf(*sections, output_filename=io.BytesIO(), stats=stats)
+
+
+def _run_music_room(frame, room_index, stats, with_pdf):
+    report = load_report_script(MUSIC_ROOM_SCRIPT, 'music_room_report')
+    recurring = report.process_bookings_for_music_room(frame, stats=stats, room_index=room_index)
+    with stats.stage('sort', rows_in=len(recurring)):
+        recurring_sorted = sorted(recurring, key=lambda x: (x['Day'], x['Time'], x['Date']))
+    if with_pdf and recurring_sorted:
+        report.create_pdf(recurring_sorted, output_filename=io.BytesIO(), stats=stats)
+
+
+REPORTS = {
+    'a3-landscape': (LANDSCAPE_SCRIPT, _run_landscape),
+    'music-room-a4': (MUSIC_ROOM_SCRIPT, _run_music_room),
+}
+
+
+def bench_size(rows, seed, with_pdf, trace_memory):
+    """Runs both reports on one dataset and returns their result entries."""
+    started = time.perf_counter()
+    documents = generate_slots(rows, seed=seed)
+    generate_s = time.perf_counter() - started
+    # The slots only carry roomIds; the reports name them from the rooms collection
+    room_index = synthetic_room_index()
+
+    landscape = load_report_script()
+    results = []
+    for name, (script, run) in REPORTS.items():
+        stats = PipelineStats(trace_memory=trace_memory)
+        previous_dir = os.getcwd()
+        # The scripts load DejaVuSans.ttf relative to the working directory
+        os.chdir(os.path.dirname(script))
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                with stats.stage('dataframe', rows_in=len(documents)) as stage:
+                    frame = landscape.frame_from_documents(documents, None, None)
+                    stage['rows_out'] = len(frame)
+                run(frame, room_index, stats, with_pdf)
+        finally:
+            os.chdir(previous_dir)
+        summary = stats.as_dict()
+        results.append({
+            'report': name,
+            'rows': rows,
+            'seed': seed,
+            'pdf': with_pdf,
+            'generate_s': round(generate_s, 3),
+            'total_s': summary['total_wall_s'],
+            'stages': stats.stages,
+        })
+    return results
+
+
+def _print_result(result, previous):
+    pdf_note = '' if result['pdf'] else '  (pdf skipped)'
+    print(f"{result['report']:<16}{result['rows']:>9,} rows"
+          f"{result['total_s']:>10.3f}s{format_delta(result['total_s'], previous.get('total_s')):>6}{pdf_note}")
+    previous_stages = {record['stage']: record for record in previous.get('stages', [])}
+    for record in result['stages']:
+        before = previous_stages.get(record['stage'], {})
+        rows = '' if record['rows_out'] is None else f"{record['rows_out']:,} rows out"
+        print(f"    {record['stage']:<20}{record['wall_s']:>10.3f}s"
+              f"{format_delta(record['wall_s'], before.get('wall_s')):>6}  {rows}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmark of the report pipelines on synthetic data.")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help="comma-separated dataset sizes in slots, e.g. 1000,10000,100000,1000000")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pdf-max-rows', type=int, default=20000,
+                        help="skip create_pdf for datasets larger than this")
+    parser.add_argument('--trace-memory', action='store_true', help="record tracemalloc peaks per stage (slower)")
+    parser.add_argument('--no-record', action='store_true', help="do not append the results to benchmarks/results")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    # Import the heavy dependencies before timing so the first size is not billed for them
+    import arabic_reshaper, bidi.algorithm, pandas, reportlab.platypus  # noqa: F401
+    previous = previous_results('scaling')
+    previous_by_key = {(item['report'], item['rows']): item for item in previous['results']} if previous else {}
+
+    results = []
+    for rows in sizes:
+        for result in bench_size(rows, args.seed, rows <= args.pdf_max_rows, args.trace_memory):
+            results.append(result)
+            before = previous_by_key.get((result['report'], result['rows']), {})
+            # A run with a different seed or without the PDF is not comparable
+            if before.get('seed') != result['seed'] or before.get('pdf') != result['pdf']:
+                before = {}
+            _print_result(result, before)
+        sys.stdout.flush()
+
+    if not args.no_record:
+        record_results('scaling', results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
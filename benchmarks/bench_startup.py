@@ -0,0 +1,136 @@
+"""
+Startup benchmark for the report entry points.
+
+Measures `--help` latency, time until the first date prompt appears and the
+`python -X importtime` breakdown, and fails when a heavy dependency is
+imported at startup or a latency exceeds the budget.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--budget-ms 300]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from bench_common import ENTRY_POINTS, format_delta, previous_results, record_results
+
+# Modules the scripts must only import once they actually fetch or render
+HEAVY_MODULES = ('pandas', 'numpy', 'pymongo', 'reportlab', 'arabic_reshaper', 'bidi')
+
+PROMPT_MARKER = 'DD.MM.YYYY'.encode('utf-8')
+
+
+def _run_help(script):
+    started = time.perf_counter()
+    subprocess.run([sys.executable, script, '--help'], cwd=os.path.dirname(script),
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def _run_until_prompt(script, timeout=30):
+    """Starts the script and returns the milliseconds until its first date prompt is printed."""
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-u', script], cwd=os.path.dirname(script),
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    timer = threading.Timer(timeout, process.kill)
+    timer.start()
+    try:
+        output = b''
+        while PROMPT_MARKER not in output:
+            chunk = os.read(process.stdout.fileno(), 4096)
+            if not chunk:
+                raise RuntimeError(f'{os.path.basename(script)} exited before prompting')
+            output += chunk
+        return (time.perf_counter() - started) * 1000
+    finally:
+        timer.cancel()
+        process.kill()
+        process.wait()
+        process.stdout.close()
+        process.stdin.close()
+
+
+def import_profile(script):
+    """
+    Runs `python -X importtime script --help` and returns (total_ms, top_level)
+    where top_level lists (cumulative_ms, module) for directly imported modules.
+    """
+    completed = subprocess.run([sys.executable, '-X', 'importtime', script, '--help'],
+                               cwd=os.path.dirname(script), capture_output=True, text=True, check=True)
+    total_us = 0
+    top_level = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        total_us += int(self_us)
+        # Nested imports are indented further than the two spaces of a top-level one
+        if not name.startswith('   '):
+            top_level.append((int(cumulative_us) / 1000, name.strip()))
+    top_level.sort(reverse=True)
+    return total_us / 1000, top_level
+
+
+def bench_entry_point(name, script, runs):
+    help_ms = [_run_help(script) for _ in range(runs)]
+    prompt_ms = [_run_until_prompt(script) for _ in range(runs)]
+    import_ms, top_level = import_profile(script)
+    imported = {module.split('.')[0] for _, module in top_level}
+    return {
+        'entry_point': name,
+        'help_ms_median': round(statistics.median(help_ms), 1),
+        'help_ms_min': round(min(help_ms), 1),
+        'first_prompt_ms_median': round(statistics.median(prompt_ms), 1),
+        'first_prompt_ms_min': round(min(prompt_ms), 1),
+        'import_ms_total': round(import_ms, 1),
+        'slowest_imports': [[module, round(ms, 1)] for ms, module in top_level[:5]],
+        'heavy_imports': sorted(imported.intersection(HEAVY_MODULES)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startup latency benchmark for the report scripts.")
+    parser.add_argument('--runs', type=int, default=5, help="repetitions per measurement")
+    parser.add_argument('--budget-ms', type=float, default=300.0,
+                        help="fail when the median --help or first-prompt latency exceeds this")
+    parser.add_argument('--no-record', action='store_true', help="do not append the results to benchmarks/results")
+    args = parser.parse_args(argv)
+
+    previous = previous_results('startup')
+    previous_by_name = {item['entry_point']: item for item in previous['results']} if previous else {}
+
+    results = []
+    failures = []
+    print(f"{'entry point':<16}{'--help ms':>13}{'prompt ms':>13}{'imports ms':>13}  heavy imports")
+    for name, script in ENTRY_POINTS.items():
+        result = bench_entry_point(name, script, args.runs)
+        results.append(result)
+        before = previous_by_name.get(name, {})
+        print(f"{name:<16}"
+              f"{result['help_ms_median']:>8.1f}{format_delta(result['help_ms_median'], before.get('help_ms_median')):>5}"
+              f"{result['first_prompt_ms_median']:>8.1f}{format_delta(result['first_prompt_ms_median'], before.get('first_prompt_ms_median')):>5}"
+              f"{result['import_ms_total']:>8.1f}{format_delta(result['import_ms_total'], before.get('import_ms_total')):>5}"
+              f"  {', '.join(result['heavy_imports']) or '-'}")
+        print(f"{'':<16}slowest imports: "
+              + ', '.join(f'{module} {ms:.1f}ms' for module, ms in result['slowest_imports']))
+
+        if result['heavy_imports']:
+            failures.append(f"{name} imports {', '.join(result['heavy_imports'])} at startup")
+        for key in ('help_ms_median', 'first_prompt_ms_median'):
+            if result[key] > args.budget_ms:
+                failures.append(f"{name} {key} {result[key]:.0f}ms exceeds {args.budget_ms:.0f}ms")
+
+    if not args.no_record:
+        record_results('startup', results)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
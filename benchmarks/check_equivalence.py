@@ -0,0 +1,264 @@
+"""
+Golden-output check for optimized report code paths.
+
+Runs the reference implementation (the report folders as committed at a git
+revision, HEAD by default, helper modules included) and the working tree on
+the same datasets and compares what the staff would see:
+
+- the recurring, one-time and grouped records, exactly and in report order,
+- the text of every page of the generated PDFs (needs `pip install pypdf`).
+
+The datasets are a fixed edge-case set, fixed-seed synthetic sets, a few
+random-seed synthetic sets (their seeds are printed so a failure can be
+replayed with --seed) and optionally a backup/export file given with --input.
+The reference runs in its own interpreter (see equivalence_worker.py), so its
+modules never mix with the working tree's.
+
+Usage:
+    python benchmarks/check_equivalence.py [--reference HEAD] [--random 2] [--no-pdf]
+"""
+import argparse
+import contextlib
+import difflib
+import io
+import os
+import pickle
+import random
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+from datetime import datetime, timezone
+
+from bson import ObjectId
+
+from bench_common import BENCH_DIR, LANDSCAPE_SCRIPT, MUSIC_ROOM_SCRIPT, REPO_ROOT
+from equivalence_worker import run_landscape, run_music_room
+from report_loader import load_report_script
+from synthetic_data import generate_slots, synthetic_rooms
+
+WORKER = os.path.join(BENCH_DIR, 'equivalence_worker.py')
+
+FIXED_SYNTHETIC = [(500, 0), (5000, 1)]
+
+# roomId of the edge-case slot whose room was deleted from the rooms collection
+DELETED_ROOM_ID = ObjectId('0' * 24)
+
+# Differences shown per section before the rest are only counted
+MAX_SHOWN_DIFFERENCES = 5
+DICT_SORT_KEYS = (
+    lambda record: (record['Room'], record['Day'], record['Start Date']),
+    lambda record: (record['Room'], record['Date']),
+    lambda record: (record['Service'], record['Date'], record['Time']),
+)
+
+
+def _edge_case(room_ids, index, room, service, provider, day, start, end, status='booked'):
+    document = {
+        '_id': f'{index:024x}',
+        'serviceName': service,
+        'providerName': provider,
+        'date': datetime(2025, 9, day, tzinfo=timezone.utc),
+        'startTime': start,
+        'endTime': end,
+        'status': status,
+    }
+    if room is not None:
+        document['roomId'] = room_ids.get(room, DELETED_ROOM_ID)
+    return document
+
+
+def edge_case_documents(rooms):
+    """
+    Small hand-written dataset covering the branches the synthetic data
+    rarely hits. Rooms are written by name and stored as the roomId of that
+    room in `rooms`, like real slots.
+    """
+    rows = [
+        # Contiguous three-slot chain, then a gap on the same day
+        ('غرفة 501', 'خدمة الشباب', 'أبونا مرقس', 6, '16:00', '17:00'),
+        ('غرفة 501', 'خدمة الشباب', 'أبونا مرقس', 6, '17:00', '18:00'),
+        ('غرفة 501', 'خدمة الشباب', 'أبونا مرقس', 6, '18:00', '19:00'),
+        ('غرفة 501', 'خدمة الشباب', 'أبونا مرقس', 6, '20:00', '21:00'),
+        # Weekly series with one missed week and padded times
+        ('غرفة الموسيقي', 'كورال الكنيسة', 'مينا جرجس', 3, ' 19:00', '20:00 '),
+        ('غرفة الموسيقي', 'كورال الكنيسة', 'مينا جرجس', 10, '19:00', '20:00'),
+        ('غرفة الموسيقي', 'كورال الكنيسة', 'مينا جرجس', 24, '19:00', '20:00'),
+        # Fortnightly pair and a one-off
+        ('غرفة 402', 'الألحان', 'مريم حنا', 2, '10:00', '11:00'),
+        ('غرفة 402', 'الألحان', 'مريم حنا', 16, '10:00', '11:00'),
+        ('غرفة 403', 'الألحان', 'مريم حنا', 17, '12:00', '13:00'),
+        # Same booking in three rooms, once as a series and once on its own
+        ('منارة رجال', 'اجتماع الخدام', 'أبونا يوحنا', 5, '18:00', '19:00'),
+        ('منارة سيدات', 'اجتماع الخدام', 'أبونا يوحنا', 5, '18:00', '19:00'),
+        ('قاعة المناسبات', 'اجتماع الخدام', 'أبونا يوحنا', 5, '18:00', '19:00'),
+        ('منارة رجال', 'اجتماع الخدام', 'أبونا يوحنا', 12, '18:00', '19:00'),
+        ('منارة سيدات', 'اجتماع الخدام', 'أبونا يوحنا', 12, '18:00', '19:00'),
+        ('السطح', 'فريق الكشافة', 'بيتر يوسف', 20, '09:00', '11:00'),
+        ('غرفة الفيديو', 'فريق الكشافة', 'بيتر يوسف', 20, '09:00', '11:00'),
+        # Missing room, a room no longer in the rooms collection, missing names and a slot that is not booked
+        (None, 'خدمة الأسرة', 'ساندرا عزيز', 8, '11:00', '12:00'),
+        ('غرفة محذوفة', 'خدمة الأسرة', 'ساندرا عزيز', 15, '11:00', '12:00'),
+        ('غرفة 505', 'nan', '', 9, '13:00', '14:00'),
+        ('غرفة 505', 'خدمة الأسرة', 'ساندرا عزيز', 9, '14:00', '15:00', 'available'),
+    ]
+    room_ids = {room['name']: room['_id'] for room in rooms}
+    return [_edge_case(room_ids, index, *row) for index, row in enumerate(rows)]
+
+
+class ReferenceTree:
+    """
+    The report folders as committed at `revision`, extracted with git archive
+    and run by equivalence_worker.py in a separate interpreter, so every
+    module the reference imports comes from that revision.
+    """
+
+    def __init__(self, revision):
+        archive = subprocess.run(['git', 'archive', revision, 'Report A3', 'Music Room Report A4'],
+                                 cwd=REPO_ROOT, capture_output=True, check=True).stdout
+        self.directory = tempfile.mkdtemp(prefix='golden-')
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            tar.extractall(self.directory)
+        self.process = subprocess.Popen([sys.executable, WORKER, self.directory],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def run(self, report, frame, with_pdf, rooms):
+        """Like the run_* functions; RuntimeError with the worker's traceback when the reference fails."""
+        pickle.dump((report, frame, with_pdf, rooms), self.process.stdin)
+        self.process.stdin.flush()
+        try:
+            status, payload = pickle.load(self.process.stdout)
+        except EOFError:
+            raise RuntimeError(f"the reference worker exited with code {self.process.wait()}") from None
+        if status == 'error':
+            raise RuntimeError(payload)
+        records, pdf_bytes, elapsed = payload
+        return records, None if pdf_bytes is None else io.BytesIO(pdf_bytes), elapsed
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def pdf_pages(pdf):
+    from pypdf import PdfReader
+
+    pdf.seek(0)
+    return [page.extract_text() for page in PdfReader(pdf).pages]
+
+
+def compare_records(reference, candidate):
+    """Returns a list of human-readable differences between two section dicts."""
+    problems = []
+    for section, expected in reference.items():
+        actual = candidate.get(section, [])
+        if len(expected) != len(actual):
+            problems.append(f"{section}: {len(expected)} records in the reference, {len(actual)} now")
+        mismatches = [index for index, (left, right) in enumerate(zip(expected, actual)) if left != right]
+        for index in mismatches[:MAX_SHOWN_DIFFERENCES]:
+            problems.append(f"{section}[{index}]:\n      reference {expected[index]}\n      candidate {actual[index]}")
+        if len(mismatches) > MAX_SHOWN_DIFFERENCES:
+            problems.append(f"{section}: {len(mismatches) - MAX_SHOWN_DIFFERENCES} more differing records")
+    return problems
+
+
+def compare_pdfs(reference_pdf, candidate_pdf):
+    if (reference_pdf is None) != (candidate_pdf is None):
+        return ["only one side produced a PDF"]
+    if reference_pdf is None:
+        return []
+    expected, actual = pdf_pages(reference_pdf), pdf_pages(candidate_pdf)
+    problems = []
+    if len(expected) != len(actual):
+        problems.append(f"pdf: {len(expected)} pages in the reference, {len(actual)} now")
+    for page, (left, right) in enumerate(zip(expected, actual), start=1):
+        if left != right:
+            diff = difflib.unified_diff(left.splitlines(), right.splitlines(), 'reference', 'candidate', lineterm='', n=1)
+            problems.append(f"pdf page {page} text differs:\n      " + '\n      '.join(list(diff)[:20]))
+            break
+    return problems
+
+
+def check_dataset(name, frame, rooms, reference, candidates, with_pdf):
+    """Runs every report on one slots frame named from `rooms`; returns the number of failing reports."""
+    failures = 0
+    for report, (candidate, run, script) in candidates.items():
+        try:
+            expected, expected_pdf, reference_s = reference.run(report, frame.copy(), with_pdf, rooms)
+        except RuntimeError as exc:
+            print(f"FAIL {name:<22}{report:<16}{len(frame):>8} slots  the reference failed:")
+            print('    ' + str(exc).rstrip().replace('\n', '\n    '))
+            failures += 1
+            continue
+        previous_dir = os.getcwd()
+        # The scripts load DejaVuSans.ttf relative to the working directory
+        os.chdir(os.path.dirname(script))
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                actual, actual_pdf, candidate_s = run(candidate, frame.copy(), with_pdf, rooms)
+        finally:
+            os.chdir(previous_dir)
+
+        problems = compare_records(expected, actual)
+        if with_pdf:
+            problems += compare_pdfs(expected_pdf, actual_pdf)
+        records = sum(len(section) for section in actual.values())
+        status = 'ok  ' if not problems else 'FAIL'
+        print(f"{status} {name:<22}{report:<16}{len(frame):>8} slots{records:>7} records"
+              f"  {reference_s:.3f}s -> {candidate_s:.3f}s")
+        for problem in problems:
+            print(f"    {problem}")
+        failures += bool(problems)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Checks that the working tree renders the same reports as a reference revision.")
+    parser.add_argument('--reference', default='HEAD', help="git revision holding the reference implementation")
+    parser.add_argument('--random', type=int, default=2, help="number of random-seed synthetic datasets")
+    parser.add_argument('--seed', type=int, action='append', default=[], help="also check the synthetic dataset of this seed")
+    parser.add_argument('--rows', type=int, default=3000, help="size of the random and --seed datasets")
+    parser.add_argument('--input', metavar='FILE', action='append', default=[],
+                        help="also check a mongoexport/backup JSON file of slots")
+    parser.add_argument('--no-pdf', action='store_true', help="compare the records only")
+    args = parser.parse_args(argv)
+
+    with_pdf = not args.no_pdf
+    if with_pdf:
+        try:
+            import pypdf  # noqa: F401
+        except ImportError:
+            print("pypdf is not installed, comparing records only (pip install pypdf for the PDF text check)")
+            with_pdf = False
+
+    candidates = {
+        'a3-landscape': (load_report_script(), run_landscape, LANDSCAPE_SCRIPT),
+        'music-room-a4': (load_report_script(MUSIC_ROOM_SCRIPT, 'music_room_report'), run_music_room, MUSIC_ROOM_SCRIPT),
+    }
+
+    candidate_landscape = candidates['a3-landscape'][0]
+    rooms = synthetic_rooms()
+    datasets = [('edge-cases', edge_case_documents(rooms))]
+    datasets += [(f'synthetic-{rows}-s{seed}', generate_slots(rows, seed=seed)) for rows, seed in FIXED_SYNTHETIC]
+    seeds = args.seed + [random.randrange(1_000_000) for _ in range(args.random)]
+    datasets += [(f'synthetic-{args.rows}-s{seed}', generate_slots(args.rows, seed=seed)) for seed in seeds]
+    with contextlib.redirect_stdout(io.StringIO()):
+        frames = [(name, candidate_landscape.frame_from_documents(documents, None, None)) for name, documents in datasets]
+        frames += [(os.path.basename(path), candidate_landscape.load_slots_from_file(path, None, None))
+                   for path in args.input]
+
+    print(f"reference: {args.reference}  candidate: working tree  pdf text: {'yes' if with_pdf else 'no'}")
+    reference = ReferenceTree(args.reference)
+    try:
+        failures = sum(check_dataset(name, frame, rooms, reference, candidates, with_pdf) for name, frame in frames)
+    finally:
+        reference.close()
+    if failures:
+        print(f"{failures} report(s) differ from the reference")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
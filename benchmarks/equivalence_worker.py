@@ -0,0 +1,141 @@
+"""
+Runs the reports of one source tree for check_equivalence.py.
+
+check_equivalence extracts the "Report A3" and "Music Room Report A4"
+folders of the reference revision with git archive and starts this worker
+on them in its own interpreter, so the reference scripts import the helper
+modules (report_records, weekly_series, ...) of their own revision instead
+of the working tree's. Requests are pickled (report, frame, with_pdf,
+rooms) tuples on stdin, `rooms` being the room documents the frame's
+roomIds refer to; every reply is ('ok', (records, pdf bytes or None,
+seconds)) or ('error', traceback) on stdout.
+
+The run_* functions are also how check_equivalence runs the working tree,
+so both sides are measured and compared the same way. Nothing here imports
+from the repository at module level.
+
+Usage (started by check_equivalence.py):
+    python benchmarks/equivalence_worker.py TREE
+"""
+import contextlib
+import importlib.util
+import inspect
+import io
+import os
+import pickle
+import sys
+import time
+import traceback
+
+# Report -> (script relative to the tree root, module name)
+SCRIPTS = {
+    'a3-landscape': (os.path.join('Report A3', 'Booking-Report-maker -Landscape.py'), 'reference_landscape'),
+    'music-room-a4': (os.path.join('Music Room Report A4', 'Music-Room-Report-A4.py'), 'reference_music_room'),
+}
+
+# Recurring, one-time and grouped order of the dict records of the original scripts' main()
+DICT_SORT_KEYS = (
+    lambda record: (record['Room'], record['Day'], record['Start Date']),
+    lambda record: (record['Room'], record['Date']),
+    lambda record: (record['Service'], record['Date'], record['Time']),
+)
+
+
+def _as_dict(record):
+    """The record as the dict of display strings it is compared by."""
+    if hasattr(record, 'display'):
+        return record.display()
+    return record._asdict() if hasattr(record, '_asdict') else dict(record)
+
+
+def _sorted_sections(module, sections):
+    """
+    The sections in report order. Revisions without sort_report_sections
+    return dicts and sorted them in main() by these keys; records are
+    compared as their display dicts, so either kind sorts the same way.
+    """
+    sort_sections = getattr(module, 'sort_report_sections', None)
+    if sort_sections is not None:
+        return [list(section) for section in sort_sections(*sections)]
+    return [sorted(section, key=lambda record: key(_as_dict(record))) for section, key in zip(sections, DICT_SORT_KEYS)]
+
+
+def _room_arguments(module, function, frame, rooms):
+    """
+    (frame, keyword arguments) naming the slots like production does: from
+    a RoomIndex of `rooms` built by the tree's own room_index module.
+    Revisions from before RoomIndex group on roomName only, so for them the
+    names are filled in from the rooms here.
+    """
+    if 'room_index' in inspect.signature(function).parameters:
+        return frame, {'room_index': module.RoomIndex(rooms)}
+    if 'roomId' in frame.columns:
+        names = {str(room['_id']): room['name'] for room in rooms}
+        frame = frame.assign(roomName=frame['roomId'].map(str).map(names))
+    return frame, {}
+
+
+def run_landscape(module, frame, with_pdf, rooms=()):
+    frame, arguments = _room_arguments(module, module.process_bookings, frame, rooms)
+    started = time.perf_counter()
+    sections = _sorted_sections(module, module.process_bookings(frame, **arguments))
+    elapsed = time.perf_counter() - started
+    pdf = None
+    if with_pdf:
+        pdf = io.BytesIO()
+        module.create_pdf(*sections, output_filename=pdf)
+    recurring, one_time, grouped = ([_as_dict(record) for record in section] for section in sections)
+    return {'recurring': recurring, 'one_time': one_time, 'grouped': grouped}, pdf, elapsed
+
+
+def run_music_room(module, frame, with_pdf, rooms=()):
+    frame, arguments = _room_arguments(module, module.process_bookings_for_music_room, frame, rooms)
+    started = time.perf_counter()
+    recurring = [_as_dict(record) for record in module.process_bookings_for_music_room(frame, **arguments)]
+    recurring.sort(key=lambda x: (x['Day'], x['Time'], x['Date']))
+    elapsed = time.perf_counter() - started
+    pdf = None
+    if with_pdf and recurring:
+        pdf = io.BytesIO()
+        module.create_pdf(recurring, output_filename=pdf)
+    return {'recurring': recurring}, pdf, elapsed
+
+
+RUNS = {'a3-landscape': run_landscape, 'music-room-a4': run_music_room}
+
+
+def _load(tree, report, modules):
+    if report not in modules:
+        relative, module_name = SCRIPTS[report]
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(tree, relative))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+        modules[report] = module
+    return modules[report]
+
+
+def serve(tree):
+    """Answers requests until stdin closes; the scripts' progress prints are discarded."""
+    sys.path.insert(0, os.path.join(tree, 'Report A3'))
+    requests, replies = sys.stdin.buffer, sys.stdout.buffer
+    modules = {}
+    while True:
+        try:
+            report, frame, with_pdf, rooms = pickle.load(requests)
+        except EOFError:
+            return
+        try:
+            # The scripts load DejaVuSans.ttf relative to the working directory
+            os.chdir(os.path.join(tree, os.path.dirname(SCRIPTS[report][0])))
+            with contextlib.redirect_stdout(io.StringIO()):
+                records, pdf, elapsed = RUNS[report](_load(tree, report, modules), frame, with_pdf, rooms)
+            reply = ('ok', (records, None if pdf is None else pdf.getvalue(), elapsed))
+        except Exception:
+            reply = ('error', traceback.format_exc())
+        pickle.dump(reply, replies)
+        replies.flush()
+
+
+if __name__ == "__main__":
+    serve(os.path.abspath(sys.argv[1]))
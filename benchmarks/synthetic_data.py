@@ -0,0 +1,179 @@
+"""
+Synthetic slot datasets for the report benchmarks.
+
+The generated documents follow the Slot schema of the backend (ObjectId
+roomId, date at UTC midnight, HH:MM start/end, serviceName, providerName,
+status, type). Like real slots they carry no room name: the reports name
+them from the rooms collection, so pass them the RoomIndex of
+synthetic_rooms(), the rooms of `Backup Data/roombooking.rooms.json` with
+their ids as ObjectIds. The data mixes:
+
+- weekly series with missed weeks,
+- bookings spanning several contiguous one-hour slots,
+- the same booking duplicated across two or three rooms,
+- one-time bookings, and evening series in the music room.
+
+Usage:
+    python benchmarks/synthetic_data.py --rows 100000 --out slots.json
+"""
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+from bench_common import REPO_ROOT
+
+ROOMS_BACKUP = os.path.join(REPO_ROOT, 'Backup Data', 'roombooking.rooms.json')
+ROOM_GROUPS_BACKUP = os.path.join(REPO_ROOT, 'Backup Data', 'roombooking.roomgroups.json')
+
+MUSIC_ROOM_NAME = 'غرفة الموسيقي'
+
+SERVICES = [
+    'خدمة ابتدائي', 'خدمة إعدادي', 'خدمة ثانوي', 'خدمة الشباب', 'خدمة الجامعيين',
+    'خدمة الخريجين', 'اجتماع السيدات', 'اجتماع الخدام', 'مدرسة الشمامسة', 'كورال الكنيسة',
+    'الألحان', 'دراسة الكتاب المقدس', 'خدمة الأسرة', 'خدمة الحضانة', 'خدمة ذوي الهمم',
+    'فريق الكشافة', 'فريق المسرح', 'خدمة الكرازة', 'إعداد خدام', 'خدمة المسنين',
+]
+
+FIRST_NAMES = [
+    'مينا', 'مرقس', 'بيتر', 'جورج', 'مايكل', 'أندرو', 'بيشوي', 'كيرلس', 'أبانوب', 'فادي',
+    'مريم', 'مارينا', 'ماري', 'نرمين', 'ساندرا', 'كاترين', 'إيريني', 'دميانة', 'فيرونيا', 'مونيكا',
+]
+
+FAMILY_NAMES = [
+    'جرجس', 'حنا', 'عزيز', 'يوسف', 'إبراهيم', 'صموئيل', 'شنودة', 'رزق', 'فهمي', 'نصيف',
+    'بطرس', 'سمعان', 'ميخائيل', 'عياد', 'زكي', 'لبيب', 'غالي', 'منير', 'وهبة', 'فايز',
+]
+
+CLERGY = ['أبونا مرقس', 'أبونا يوحنا', 'أبونا بولس', 'أبونا داود']
+
+# Share of generated bookings per kind (the rest are single-room bookings)
+MULTI_ROOM_SHARE = 0.15
+ONE_TIME_SHARE = 0.2
+MUSIC_ROOM_SHARE = 0.08
+MISSED_WEEK_PROBABILITY = 0.1
+
+
+def synthetic_rooms(path=ROOMS_BACKUP):
+    """The rooms collection the synthetic slots refer to: the backup's rooms as documents with ObjectId ids."""
+    from bson import ObjectId
+
+    with open(path, encoding='utf-8') as handle:
+        rooms = json.load(handle)
+    return [{'_id': ObjectId(room['_id']['$oid']), 'name': room['name'], 'isEnabled': room.get('isEnabled', True)}
+            for room in rooms]
+
+
+def synthetic_room_index():
+    """RoomIndex of synthetic_rooms() and the backup's room groups, as the reports load it from the database."""
+    from room_index import RoomIndex
+
+    with open(ROOM_GROUPS_BACKUP, encoding='utf-8') as handle:
+        room_groups = json.load(handle)
+    return RoomIndex(synthetic_rooms(), room_groups)
+
+
+def load_rooms(path=ROOMS_BACKUP):
+    """Returns [(room_id, name)] for the rooms of synthetic_rooms()."""
+    return [(room['_id'], room['name']) for room in synthetic_rooms(path)]
+
+
+def _providers(rng, count):
+    """Clergy plus `count` servants named the Egyptian way: own, father's and family name."""
+    servants = rng.sample(range(len(FIRST_NAMES) ** 2 * len(FAMILY_NAMES)), count)
+    names = []
+    for number in servants:
+        number, family = divmod(number, len(FAMILY_NAMES))
+        own, father = divmod(number, len(FIRST_NAMES))
+        names.append(f"{FIRST_NAMES[own]} {FIRST_NAMES[father]} {FAMILY_NAMES[family]}")
+    return CLERGY + names
+
+
+def _slot(index, room, service, provider, day, hour, kind):
+    return {
+        '_id': f'{index:024x}',
+        'roomId': room[0],
+        'serviceName': service,
+        'providerName': provider,
+        'date': datetime(day.year, day.month, day.day, tzinfo=timezone.utc),
+        'startTime': f'{hour:02d}:00',
+        'endTime': f'{hour + 1:02d}:00',
+        'status': 'booked',
+        'type': kind,
+    }
+
+
+def generate_slots(rows, seed=0, start_date=None, weeks=16):
+    """
+    Returns exactly `rows` booked slot documents. The same seed always
+    produces the same dataset, so benchmark runs are comparable.
+    """
+    rng = random.Random(seed)
+    rooms = load_rooms()
+    music_room = next((room for room in rooms if room[1] == MUSIC_ROOM_NAME), rooms[0])
+    other_rooms = [room for room in rooms if room is not music_room]
+    start_date = start_date or datetime(2025, 9, 6).date()
+    # Roughly one provider per 40 rows keeps the partitions realistic at every size
+    providers = _providers(rng, max(8, min(2000, rows // 40)))
+
+    documents = []
+    while len(documents) < rows:
+        service = rng.choice(SERVICES)
+        provider = rng.choice(providers)
+        duration = rng.choice([1, 1, 1, 2, 2, 3])
+        roll = rng.random()
+
+        if roll < MUSIC_ROOM_SHARE:
+            booking_rooms = [music_room]
+            first_hour = rng.randint(18, 22 - duration)
+        elif roll < MUSIC_ROOM_SHARE + MULTI_ROOM_SHARE:
+            booking_rooms = rng.sample(other_rooms, rng.choice([2, 2, 3]))
+            first_hour = rng.randint(9, 22 - duration)
+        else:
+            booking_rooms = [rng.choice(other_rooms)]
+            first_hour = rng.randint(9, 22 - duration)
+
+        first_day = start_date + timedelta(days=rng.randrange(7 * weeks))
+        if rng.random() < ONE_TIME_SHARE:
+            days = [first_day]
+            kind = 'single'
+        else:
+            series_weeks = rng.randint(3, weeks)
+            days = [first_day + timedelta(weeks=week) for week in range(series_weeks)
+                    if week == 0 or rng.random() >= MISSED_WEEK_PROBABILITY]
+            kind = 'weekly'
+
+        for day in days:
+            for room in booking_rooms:
+                for hour in range(first_hour, first_hour + duration):
+                    documents.append(_slot(len(documents), room, service, provider, day, hour, kind))
+
+    return documents[:rows]
+
+
+def write_slots(documents, path):
+    """
+    Writes the documents as a mongoexport-style JSON array, readable by the
+    scripts' --input, which name the rooms from the same backup rooms.
+    """
+    from bson import json_util
+
+    with open(path, 'w', encoding='utf-8') as handle:
+        handle.write(json_util.dumps(documents, json_options=json_util.RELAXED_JSON_OPTIONS, ensure_ascii=False))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Writes a synthetic booked-slots dataset.")
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='synthetic_slots.json')
+    args = parser.parse_args(argv)
+
+    documents = generate_slots(args.rows, seed=args.seed)
+    write_slots(documents, args.out)
+    print(f"Wrote {len(documents)} slots to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
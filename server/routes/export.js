@@ -1,9 +1,62 @@
 const express = require('express');
+const http = require('http');
+const https = require('https');
 const router = express.Router();
 const Slot = require('../models/Slot');
 const authMiddleware = require('../middleware/auth');
 const { processBookings, createPDF } = require('../utils/pdfGenerator');
 
+// Optional Python report service ("Report A3/report_service.py"), e.g. http://127.0.0.1:8765
+const REPORT_SERVICE_URL = process.env.REPORT_SERVICE_URL;
+const REPORT_SERVICE_TIMEOUT_MS = 10 * 60 * 1000;
+
+// Streams the A3 landscape report from the report service.
+// Resolves to false (without touching res) if the service is unreachable or has no report.
+// Once the PDF has started streaming, a failure ends res instead: the caller must not fall back.
+const streamFromReportService = (startDate, endDate, res) => new Promise((resolve) => {
+  let streaming = false;
+
+  const url = new URL('/reports/a3-landscape', REPORT_SERVICE_URL);
+  url.searchParams.set('start', startDate);
+  url.searchParams.set('end', endDate);
+
+  const client = url.protocol === 'https:' ? https : http;
+  const request = client.get(url, (serviceRes) => {
+    if (serviceRes.statusCode !== 200) {
+      console.warn(`⚠️ Report service responded with ${serviceRes.statusCode}`);
+      serviceRes.resume();
+      resolve(false);
+      return;
+    }
+
+    res.setHeader('Content-Type', 'application/pdf');
+    res.setHeader('Content-Disposition', `attachment; filename=Booking_Report_${startDate}_${endDate}.pdf`);
+    if (serviceRes.headers['content-length']) {
+      res.setHeader('Content-Length', serviceRes.headers['content-length']);
+    }
+    streaming = true;
+    serviceRes.pipe(res);
+    serviceRes.on('end', () => resolve(true));
+    serviceRes.on('error', (err) => {
+      console.error('❌ Report service stream error:', err);
+      res.destroy(err);
+      resolve(true);
+    });
+  });
+
+  request.setTimeout(REPORT_SERVICE_TIMEOUT_MS, () => request.destroy(new Error('Report service timed out')));
+  request.on('error', (err) => {
+    if (streaming || res.headersSent) {
+      console.error('❌ Report service stream interrupted:', err.message);
+      res.destroy(err);
+      resolve(true);
+      return;
+    }
+    console.warn('⚠️ Report service unavailable:', err.message);
+    resolve(false);
+  });
+});
+
 
 // Export all slots to JSON (admin only)
 router.get('/slots/json', authMiddleware, async (req, res) => {
@@ -87,6 +140,15 @@ router.get('/bookings/pdf', authMiddleware, async (req, res) => {
       return res.status(400).json({ error: 'startDate must be before or equal to endDate' });
     }
 
+    if (REPORT_SERVICE_URL) {
+      console.log('🐍 Delegating PDF generation to the report service...');
+      if (await streamFromReportService(startDate, endDate, res)) {
+        console.log('✅ PDF streamed from the report service');
+        return;
+      }
+      console.log('↩️ Falling back to the built-in PDF generator');
+    }
+
     console.log('🔍 Fetching booked slots...');
     // Fetch booked slots in date range
     const slots = await Slot.find({
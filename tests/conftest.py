@@ -0,0 +1,10 @@
+"""
+The report helpers import each other as top-level modules from "Report A3",
+like the scripts do when run from that folder.
+"""
+import os
+import sys
+
+REPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Report A3')
+if REPORT_DIR not in sys.path:
+    sys.path.insert(0, REPORT_DIR)
@@ -0,0 +1,37 @@
+"""
+A minimal in-memory stand-in for the pymongo objects the report code uses:
+find() with equality filters and inclusion projections, and a change stream
+fed from a list.
+"""
+
+
+def _project(document, projection):
+    if not projection:
+        return dict(document)
+    return {key: value for key, value in document.items() if key == '_id' or projection.get(key)}
+
+
+class FakeCollection:
+    def __init__(self, documents=()):
+        self.documents = list(documents)
+
+    def find(self, query=None, projection=None):
+        query = query or {}
+        return [_project(document, projection) for document in self.documents
+                if all(document.get(key) == value for key, value in query.items())]
+
+
+class FakeDatabase:
+    def __init__(self, **collections):
+        self.collections = {name: FakeCollection(documents) for name, documents in collections.items()}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+
+class FakeClient:
+    def __init__(self, database):
+        self.database = database
+
+    def __getitem__(self, name):
+        return self.database
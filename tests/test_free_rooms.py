@@ -0,0 +1,58 @@
+from datetime import date, datetime
+
+import pytest
+
+from fake_mongo import FakeClient, FakeDatabase
+
+ENABLED, DISABLED, IDLE = '0' * 23 + '1', '0' * 23 + '2', '0' * 23 + '3'
+THURSDAY = date(2025, 10, 2)
+
+
+def _slot(room_id, day, start, end):
+    return {'_id': f'{room_id}-{day:%Y%m%d}-{start}', 'roomId': room_id, 'serviceName': 'خدمة', 'providerName': 'خادم',
+            'date': datetime(day.year, day.month, day.day), 'startTime': start, 'endTime': end,
+            'status': 'booked', 'type': 'single'}
+
+
+@pytest.fixture
+def database():
+    rooms = [
+        {'_id': ENABLED, 'name': 'غرفة 1', 'isEnabled': True},
+        {'_id': DISABLED, 'name': 'غرفة 2', 'isEnabled': False},
+        {'_id': IDLE, 'name': 'غرفة 3'},
+    ]
+    groups = [{'_id': 'g', 'name': 'المنارات', 'rooms': [ENABLED, DISABLED, IDLE], 'isEnabled': True}]
+    slots = [_slot(ENABLED, THURSDAY, '18:00', '19:00'), _slot(DISABLED, THURSDAY, '10:00', '11:00')]
+    return FakeDatabase(rooms=rooms, roomgroups=groups, slots=slots)
+
+
+def test_room_index_leaves_disabled_rooms_out_of_names(database):
+    from room_index import RoomIndex
+
+    room_index = RoomIndex.from_database(database)
+    assert set(room_index.names) == {ENABLED, IDLE}
+    # Past slots of the disabled room are still named
+    assert room_index.all_names[DISABLED] == 'غرفة 2'
+
+
+@pytest.mark.parametrize('start_time, end_time', [('18:00', '20:00'), ('10:00', '11:00'), ('06:00', '07:00')])
+@pytest.mark.parametrize('group', [None, 'المنارات'])
+def test_disabled_room_is_never_free(database, start_time, end_time, group):
+    from report_service import ReportService, SlotSnapshot
+
+    snapshot = SlotSnapshot(FakeClient(database), 'roombooking', 'slots')
+    snapshot.refresh()
+    free = ReportService(snapshot).free_rooms([THURSDAY], start_time, end_time, group=group)
+
+    assert 'غرفة 2' not in free
+    assert 'غرفة 3' in free
+    assert ('غرفة 1' in free) == (start_time != '18:00')
+
+
+def test_unknown_group_is_an_error(database):
+    from report_service import ReportService, SlotSnapshot
+
+    snapshot = SlotSnapshot(FakeClient(database), 'roombooking', 'slots')
+    snapshot.refresh()
+    with pytest.raises(ValueError):
+        ReportService(snapshot).free_rooms([THURSDAY], '18:00', '20:00', group='لا يوجد')
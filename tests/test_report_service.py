@@ -0,0 +1,68 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import pytest
+
+from fake_mongo import FakeClient, FakeDatabase
+
+ROOM = '0' * 23 + '1'
+THURSDAY = date(2025, 10, 2)
+
+
+def _slot(day, start, end):
+    return {'_id': f'{day:%Y%m%d}-{start}', 'roomId': ROOM, 'serviceName': 'خدمة', 'providerName': 'خادم',
+            'date': datetime(day.year, day.month, day.day), 'startTime': start, 'endTime': end,
+            'status': 'booked', 'type': 'single'}
+
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    from report_loader import REPORT_DIR
+    from report_service import SlotSnapshot
+
+    # The PDF build loads the font relative to the working directory
+    monkeypatch.chdir(REPORT_DIR)
+    database = FakeDatabase(rooms=[{'_id': ROOM, 'name': 'غرفة 1'}], slots=[_slot(THURSDAY, '18:00', '19:00')])
+    snapshot = SlotSnapshot(FakeClient(database), 'roombooking', 'slots')
+    snapshot.refresh()
+    return snapshot
+
+
+def test_build_keeps_the_report_progress_out_of_the_log(snapshot, capsys):
+    from report_service import ReportService
+
+    pdf_bytes = ReportService(snapshot).render('a3-landscape', THURSDAY, THURSDAY)
+
+    assert pdf_bytes.startswith(b'%PDF')
+    log_lines = capsys.readouterr().out.splitlines()
+    assert len(log_lines) == 1 and 'a3-landscape' in log_lines[0]
+
+
+def test_build_does_not_wait_for_a_refresh_in_progress(snapshot, monkeypatch):
+    from report_loader import load_report_script
+    from report_service import ReportService
+
+    report = load_report_script()
+    merge_booked_slots = report.merge_booked_slots
+    merging, release = threading.Event(), threading.Event()
+
+    def slow_merge(*args, **kwargs):
+        merging.set()
+        release.wait(10)
+        return merge_booked_slots(*args, **kwargs)
+
+    monkeypatch.setattr(report, 'merge_booked_slots', slow_merge)
+    snapshot.collection.documents.append(_slot(THURSDAY, '20:00', '21:00'))
+    service = ReportService(snapshot)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        refreshing = executor.submit(snapshot.refresh)
+        assert merging.wait(10)
+        try:
+            pdf_bytes = executor.submit(service.render, 'a3-landscape', THURSDAY, THURSDAY).result(timeout=10)
+        finally:
+            release.set()
+        refreshing.result(timeout=10)
+
+    assert pdf_bytes.startswith(b'%PDF')
+    assert snapshot.version == 2
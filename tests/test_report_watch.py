@@ -0,0 +1,179 @@
+from datetime import date, datetime
+
+import pytest
+
+ROOM = '0' * 23 + '1'
+START, END = date(2025, 10, 1), date(2025, 12, 31)
+
+
+def _slot(slot_id, service, provider, day, start='18:00', end='19:00', status='booked'):
+    return {'_id': slot_id, 'roomId': ROOM, 'serviceName': service, 'providerName': provider,
+            'date': datetime(day.year, day.month, day.day), 'startTime': start, 'endTime': end,
+            'status': status, 'type': 'single'}
+
+
+def _change(operation, document=None, slot_id=None, coll='slots'):
+    change = {'operationType': operation, 'ns': {'db': 'roombooking', 'coll': coll},
+              'documentKey': {'_id': slot_id if slot_id is not None else document['_id']}}
+    if document is not None:
+        change['fullDocument'] = document
+    return change
+
+
+class SpyReport:
+    """The report module, recording the (service, provider) partitions process_bookings runs on."""
+
+    def __init__(self, report):
+        self.report = report
+        self.processed = []
+
+    def __getattr__(self, name):
+        return getattr(self.report, name)
+
+    def process_bookings(self, frame, *args, **kwargs):
+        self.processed.append(set(zip(frame['serviceName'].astype(str), frame['providerName'].astype(str))))
+        return self.report.process_bookings(frame, *args, **kwargs)
+
+    def rebuilt(self):
+        partitions = set().union(*self.processed) if self.processed else set()
+        self.processed.clear()
+        return partitions
+
+
+@pytest.fixture(scope='module')
+def report():
+    from report_loader import load_report_script
+
+    return load_report_script()
+
+
+@pytest.fixture
+def model(report):
+    from report_watch import BookingModel
+    from room_index import RoomIndex
+
+    spy = SpyReport(report)
+    model = BookingModel(spy, START, END, room_index=RoomIndex([{'_id': ROOM, 'name': 'غرفة 1'}]))
+    # Three weekly Thursdays of (خدمة أ, خادم 1) and one booking of (خدمة ب, خادم 2)
+    model.load([_slot(f'a{week}', 'خدمة أ', 'خادم 1', date(2025, 10, 2 + 7 * week)) for week in range(3)]
+               + [_slot('b0', 'خدمة ب', 'خادم 2', date(2025, 10, 4))])
+    model.refresh()
+    spy.rebuilt()
+    return model
+
+
+def test_load_names_slots_from_the_room_index(model):
+    recurring, one_time, _ = model.refresh()
+    assert [record.room for record in recurring] == ['غرفة 1']
+    assert [(record.service, record.room) for record in one_time] == [('خدمة ب', 'غرفة 1')]
+
+
+def test_insert_rebuilds_only_its_partition(model):
+    assert model.apply_change(_change('insert', _slot('b1', 'خدمة ب', 'خادم 2', date(2025, 10, 11))))
+    recurring, one_time, _ = model.refresh()
+
+    assert model.report.rebuilt() == {('خدمة ب', 'خادم 2')}
+    assert {record.service for record in recurring} == {'خدمة أ', 'خدمة ب'}
+    assert not list(one_time)
+
+
+def test_update_moving_a_slot_rebuilds_both_partitions(model):
+    moved = _slot('a2', 'خدمة ب', 'خادم 2', date(2025, 10, 16))
+    assert model.apply_change(_change('update', moved))
+    model.refresh()
+
+    assert model.report.rebuilt() == {('خدمة أ', 'خادم 1'), ('خدمة ب', 'خادم 2')}
+
+
+def test_update_that_unbooks_drops_the_slot(model):
+    cancelled = _slot('a0', 'خدمة أ', 'خادم 1', date(2025, 10, 2), status='cancelled')
+    assert model.apply_change(_change('update', cancelled))
+    recurring, _, _ = model.refresh()
+
+    assert model.report.rebuilt() == {('خدمة أ', 'خادم 1')}
+    assert recurring[0].booking_count == 2
+
+
+def test_delete_of_the_last_slot_removes_the_partition(model):
+    assert model.apply_change(_change('delete', slot_id='b0'))
+    _, one_time, _ = model.refresh()
+
+    # Nothing is left to process; the partition's records are gone
+    assert model.report.rebuilt() == set()
+    assert not list(one_time)
+    assert ('خدمة ب', 'خادم 2') not in model.partitions
+
+
+def test_unknown_and_out_of_range_changes_rebuild_nothing(model):
+    assert not model.apply_change(_change('delete', slot_id='missing'))
+    assert not model.apply_change(_change('insert', _slot('x', 'خدمة ج', 'خادم 3', date(2026, 3, 1))))
+    model.refresh()
+
+    assert model.report.rebuilt() == set()
+
+
+def test_room_change_asks_for_a_reload(model):
+    assert model.apply_change(_change('update', {'_id': ROOM, 'name': 'غرفة جديدة'}, coll='rooms'))
+    assert model.rooms_changed
+    assert model.report.rebuilt() == set()
+
+
+class FakeStream:
+    """A change feed: every try_next() returns the next item (None = no change) and advances the clock."""
+
+    def __init__(self, items, clock, step=1.0):
+        self.items = list(items)
+        self.clock = clock
+        self.step = step
+
+    @property
+    def alive(self):
+        return bool(self.items)
+
+    def try_next(self):
+        self.clock.now += self.step
+        return self.items.pop(0)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _run(model, items, debounce=2.0, max_delay=30.0):
+    from report_watch import run_watch_loop
+
+    clock = FakeClock()
+    refreshes = []
+
+    def on_refresh():
+        refreshes.append((clock.now, model.refresh()))
+
+    run_watch_loop(FakeStream(items, clock), model, on_refresh, debounce_seconds=debounce,
+                   max_delay_seconds=max_delay, clock=clock)
+    return [when for when, _ in refreshes]
+
+
+def test_watch_loop_debounces_a_burst_into_one_refresh(model):
+    burst = [_change('insert', _slot(f'b{week}', 'خدمة ب', 'خادم 2', date(2025, 10, 4 + 7 * week))) for week in (1, 2, 3)]
+    # Changes at t=1..3, then quiet from t=4: refreshed once the feed was quiet for 2 s (t=5)
+    assert _run(model, burst + [None] * 5) == [5.0]
+    assert model.report.rebuilt() == {('خدمة ب', 'خادم 2')}
+
+
+def test_watch_loop_ignores_changes_that_touch_nothing(model):
+    assert _run(model, [_change('delete', slot_id='missing'), None, None, None]) == []
+
+
+def test_watch_loop_refreshes_a_feed_that_never_goes_quiet(model):
+    changes = [_change('insert', _slot(f'c{day}', 'خدمة ب', 'خادم 2', date(2025, 11, 1 + day))) for day in range(10)]
+    # A change every second never leaves 2 s of quiet; max_delay forces a refresh 4 s after the first
+    assert _run(model, changes, max_delay=4.0) == [5.0, 10.0]
+
+
+def test_watch_loop_flushes_pending_changes_when_the_stream_closes(model):
+    assert _run(model, [_change('delete', slot_id='b0')]) == [1.0]
+    assert ('خدمة ب', 'خادم 2') not in model.partitions
@@ -0,0 +1,30 @@
+from datetime import date
+
+import pandas as pd
+
+
+def _occupied(room, day, start, end):
+    return pd.DataFrame({'room': [room], 'date': [pd.Timestamp(day)], 'start': [start], 'end': [end]})
+
+
+def test_idle_rooms_count_as_unused():
+    from utilization import Utilization
+
+    # One Thursday, room A booked 18:00-20:00, room B never booked
+    occupied = _occupied('A', date(2025, 10, 2), 18 * 60, 20 * 60)
+    utilization = Utilization.from_occupied(occupied, date(2025, 10, 2), date(2025, 10, 2), rooms=['A', 'B'])
+
+    assert utilization.rooms == ['A', 'B']
+    thursday = 5
+    assert utilization.weekday_hour_occupancy()[thursday, utilization.hours.index(18)] == 0.5
+    assert {window['room'] for window in utilization.free_windows()} == {'A', 'B'}
+
+
+def test_rooms_without_any_booking():
+    from utilization import Utilization
+
+    empty = _occupied('A', date(2025, 10, 2), 0, 0).iloc[:0]
+    utilization = Utilization.from_occupied(empty, date(2025, 10, 1), date(2025, 10, 7), rooms=['A', 'B'])
+
+    assert utilization.rooms == ['A', 'B']
+    assert not utilization.weekday_hour_occupancy().any()
@@ -0,0 +1,29 @@
+import pytest
+
+
+def _pairs(missing, bookings):
+    """moved_sessions over (key, day) lists, as sorted (booking day, missing day) pairs."""
+    from weekly_series import moved_sessions
+
+    booked, replaced = moved_sessions([key for key, _ in missing], [day for _, day in missing],
+                                      [key for key, _ in bookings], [day for _, day in bookings])
+    return sorted((bookings[b][1], missing[m][1]) for b, m in zip(booked, replaced))
+
+
+@pytest.mark.parametrize('missing', [[(1, 10), (1, 17)], [(1, 17), (1, 10)]])
+def test_two_missing_weeks_competing_for_one_booking(missing):
+    # The earlier week gets it, whatever the row order
+    assert _pairs(missing, [(1, 13)]) == [(13, 10)]
+
+
+def test_every_week_paired_when_the_bookings_allow_it():
+    assert _pairs([(1, 10), (1, 14)], [(1, 12), (1, 8)]) == [(8, 10), (12, 14)]
+    # The nearest booking of day 10 is the only one day 16 can use
+    assert _pairs([(1, 10), (1, 16)], [(1, 5), (1, 11)]) == [(5, 10), (11, 16)]
+
+
+def test_only_nearby_bookings_of_the_same_key_stand_in():
+    bookings = [(1, 5), (1, 11), (1, 10), (2, 11), (1, 17)]
+    assert _pairs([(1, 10)], bookings) == [(11, 10)]
+    assert _pairs([(1, 10)], []) == []
+    assert _pairs([], bookings) == []